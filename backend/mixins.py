@@ -0,0 +1,94 @@
+# backend/mixins.py
+
+
+class DirtyFieldsMixin:
+    """
+    Remember the values of tracked_fields as loaded from the database so
+    code running around save() (post_save handlers included) can tell which
+    ones actually changed. The snapshot is reset once a save completes.
+
+    Fields without a loaded value (new or hand-built instances, deferred
+    fields) always count as changed. Pass a save's update_fields to
+    has_changed() to ignore fields that save did not write.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_tracked_fields()
+        return instance
+
+    def tracked_attnames(self, fields=None):
+        for name in fields if fields is not None else self.tracked_fields:
+            yield self._meta.get_field(name).attname
+
+    def snapshot_tracked_fields(self, fields=None):
+        if not hasattr(self, '_original_values'):
+            self._original_values = {}
+        for attname in self.tracked_attnames(fields):
+            if attname in self.__dict__:
+                self._original_values[attname] = self.__dict__[attname]
+
+    def get_dirty_fields(self):
+        """{attname: original value} for each tracked field that changed"""
+        original = getattr(self, '_original_values', {})
+        missing = object()
+        return {
+            attname: original.get(attname)
+            for attname in self.tracked_attnames()
+            if original.get(attname, missing) is missing
+            or original[attname] != self.__dict__.get(attname)
+        }
+
+    def has_changed(self, *fields, update_fields=None):
+        """
+        Whether any of the given tracked fields (default: all) changed since
+        load, counting only those in update_fields when it is given
+        """
+        dirty = self.get_dirty_fields()
+        attnames = self.tracked_attnames(fields or None)
+        if update_fields is not None:
+            written = self.written_fields(update_fields)
+            attnames = [attname for attname in attnames if attname in written]
+        return any(attname in dirty for attname in attnames)
+
+    def written_fields(self, update_fields):
+        """Attnames of the tracked fields a save with update_fields writes"""
+        return {
+            self._meta.get_field(name).attname for name in self.tracked_fields
+            if name in update_fields or self._meta.get_field(name).attname in update_fields
+        }
+
+    def get_original_value(self, field):
+        """The loaded value of a tracked field (None if unknown)"""
+        attname = self._meta.get_field(field).attname
+        return getattr(self, '_original_values', {}).get(attname)
+
+    def get_saved_value(self, field, update_fields=None):
+        """
+        The value a tracked field has in the database after a save with
+        update_fields: the current value if that save wrote it, else the loaded one
+        """
+        attname = self._meta.get_field(field).attname
+        if update_fields is None or attname in self.written_fields(update_fields):
+            return getattr(self, attname)
+        return self.get_original_value(field)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            written = self.written_fields(update_fields)
+            self.snapshot_tracked_fields([
+                name for name in self.tracked_fields if self._meta.get_field(name).attname in written
+            ])
+        else:
+            self.snapshot_tracked_fields()
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self.snapshot_tracked_fields([
+            name for name in self.tracked_fields
+            if fields is None or name in fields or self._meta.get_field(name).attname in fields
+        ])
@@ -0,0 +1,14 @@
+# backend/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """
+    Keyset pagination over created_at, newest first, shared by the listing
+    endpoints. Ordering on (created_at, id) keeps pages stable when rows
+    share a timestamp.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
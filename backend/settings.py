@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     'articleApp',
     'faq',
     'templateApp',
+    'emailApp',
  
    
 ]
@@ -60,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'chatApp.middleware.NotificationBatchMiddleware',
     # 'channels.middleware.WebSocketMiddleware',
 ]
 
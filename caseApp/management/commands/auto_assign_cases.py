@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from caseApp.matching import auto_assign_pending_cases
+from caseApp.views import send_case_notification
+
+
+class Command(BaseCommand):
+    help = 'Assign the best matching lawyer to pending cases that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Maximum number of cases to assign')
+
+    def handle(self, *args, **options):
+        assigned, unassigned = auto_assign_pending_cases(limit=options['limit'])
+        for case in assigned:
+            send_case_notification(case)
+            self.stdout.write(f"Assigned {case.case_number} to lawyer {case.lawyer_id}")
+        self.stdout.write(f"Assigned {len(assigned)} case(s), {unassigned} left unassigned")
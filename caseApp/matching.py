@@ -0,0 +1,113 @@
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Least
+
+from professionalApp.models import Lawyer
+from .models import Case
+
+
+# Points per criterion; a lawyer's score is the weighted sum
+SPECIALIZATION_WEIGHT = 100
+DISTRICT_WEIGHT = 30
+EXPERIENCE_WEIGHT = 1  # per year, capped at MAX_EXPERIENCE_YEARS
+LOAD_WEIGHT = 10  # subtracted per open case
+MAX_EXPERIENCE_YEARS = 20
+
+
+def eligible_lawyers():
+    """Lawyers that can take new cases: accepted, active, with an active account"""
+    return Lawyer.objects.filter(
+        status='accepted',
+        availability_status='active',
+        user__is_active=True
+    )
+
+
+def rank_lawyers(case, limit=10):
+    """
+    Eligible lawyers for a case, best match first, annotated with
+    specialization_match, district_match, open_cases and match_score.
+    Everything is computed in one query; open case counts come from
+    LawyerWorkload instead of counting cases.
+    """
+    if case.specialization_id:
+        specialization_match = models.Case(
+            models.When(
+                models.Exists(
+                    Lawyer.specializations.through.objects.filter(
+                        lawyer_id=models.OuterRef('pk'),
+                        specialization_id=case.specialization_id
+                    )
+                ),
+                then=models.Value(1)
+            ),
+            default=models.Value(0)
+        )
+    else:
+        specialization_match = models.Value(0)
+
+    client_district = case.client.district_code
+    if client_district:
+        district_match = models.Case(
+            models.When(residence_district_code=client_district, then=models.Value(1)),
+            default=models.Value(0)
+        )
+    else:
+        district_match = models.Value(0)
+
+    return eligible_lawyers().select_related('user').annotate(
+        specialization_match=specialization_match,
+        district_match=district_match,
+        open_cases=Coalesce(models.F('workload__open_cases'), 0),
+        experience_points=Least(models.F('years_of_experience'), MAX_EXPERIENCE_YEARS),
+    ).annotate(
+        match_score=models.ExpressionWrapper(
+            models.F('specialization_match') * SPECIALIZATION_WEIGHT
+            + models.F('district_match') * DISTRICT_WEIGHT
+            + models.F('experience_points') * EXPERIENCE_WEIGHT
+            - models.F('open_cases') * LOAD_WEIGHT,
+            output_field=models.IntegerField()
+        )
+    ).order_by('-match_score', 'open_cases', 'id')[:limit]
+
+
+def assign_best_lawyer(case_id):
+    """
+    Assign the best ranked lawyer to a pending, unassigned case. The case
+    row is locked so concurrent runs never assign it twice. Returns the
+    updated case, or None if it was taken, changed or no lawyer is eligible.
+    """
+    with transaction.atomic():
+        case = Case.objects.select_for_update(skip_locked=True).select_related('client').filter(
+            pk=case_id,
+            status='pending',
+            lawyer__isnull=True
+        ).first()
+        if case is None:
+            return None
+
+        best = rank_lawyers(case, limit=1).first()
+        if best is None:
+            return None
+
+        # The post_save signals update the workload and open the chat room
+        case.lawyer = best
+        case.status = 'assigned'
+        case.save()
+    return case
+
+
+def auto_assign_pending_cases(limit=100):
+    """
+    Assign lawyers to the oldest pending, unassigned cases, one case at a
+    time so each ranking sees the load added by the previous assignments.
+    Returns (assigned cases, number of cases left unassigned).
+    """
+    case_ids = list(
+        Case.objects.filter(status='pending', lawyer__isnull=True).order_by('created_at', 'id').values_list('id', flat=True)[:limit]
+    )
+    assigned = []
+    for case_id in case_ids:
+        case = assign_best_lawyer(case_id)
+        if case is not None:
+            assigned.append(case)
+    return assigned, len(case_ids) - len(assigned)
@@ -5,9 +5,33 @@ from userApp.models import CustomUser
 from professionalApp.models import Lawyer
 from clientApp.models import Client
 from speciliarizationApp.models import Specialization
+from backend.mixins import DirtyFieldsMixin
 
 
-class Case(models.Model):
+class CaseQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for cases
+    """
+
+    def for_listing(self):
+        """
+        Join and prefetch every relation CaseSerializer touches so that
+        serializing a list of cases costs a fixed number of queries
+        """
+        return self.select_related(
+            'client__user',
+            'lawyer__user',
+            'lawyer__created_by',
+            'specialization__created_by',
+        ).prefetch_related(
+            models.Prefetch(
+                'lawyer__specializations',
+                queryset=Specialization.objects.select_related('created_by')
+            )
+        )
+
+
+class Case(DirtyFieldsMixin, models.Model):
     """
     Minimal model for legal cases submitted by clients and assigned to lawyers
     """
@@ -20,6 +44,9 @@ class Case(models.Model):
         ('rejected', 'Rejected'),  # When case is rejected
     ]
     
+    # Statuses that count towards a lawyer's workload
+    OPEN_STATUSES = ('pending', 'assigned', 'in_progress')
+    
     # Case information
     title = models.CharField(max_length=200)
     case_number = models.CharField(max_length=50, unique=True, editable=False)
@@ -53,6 +80,11 @@ class Case(models.Model):
     created_at = models.DateTimeField(default=now)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CaseQuerySet.as_manager()
+    
+    # Changes to these are visible to post_save handlers (see DirtyFieldsMixin)
+    tracked_fields = ('status', 'lawyer')
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Case'
@@ -0,0 +1,5 @@
+from backend.pagination import NewestFirstCursorPagination
+
+
+class CaseCursorPagination(NewestFirstCursorPagination):
+    """Keyset pagination for case listings, newest first"""
@@ -1,3 +1,100 @@
+import datetime
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from caseApp.models import Case
+from caseApp.serializers import CaseSerializer
+from clientApp.models import Client
+from professionalApp.models import Lawyer
+from speciliarizationApp.models import Specialization
+from userApp.models import CustomUser
+
+
+class CaseTestCase(TestCase):
+    """
+    Base class with a helper creating a fully populated case
+    """
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            phone_number='0780000000', role='admin', email='admin@gmail.com', password='Secret#123'
+        )
+        self.counter = 0
+
+    def make_case(self):
+        self.counter += 1
+        n = self.counter
+        client_user = CustomUser.objects.create_user(phone_number=f'0781{n:06d}', role='customer')
+        client = Client.objects.create(
+            user=client_user, first_name='Client', last_name=str(n), gender='male',
+            date_of_birth=datetime.date(1990, 1, 1), marital_status='single',
+            province='Kigali', district='Gasabo', sector='Remera', cell='Rukiri',
+            education_level='bachelor', national_id=f'C{n:015d}'
+        )
+        lawyer_user = CustomUser.objects.create_user(phone_number=f'0782{n:06d}', role='lawyer')
+        lawyer = Lawyer.objects.create(
+            user=lawyer_user, first_name='Lawyer', last_name=str(n), gender='female',
+            marital_status='single', residence_district='Gasabo', residence_sector='Remera',
+            education_level='master', national_id_number=f'L{n:015d}', created_by=self.admin
+        )
+        specialization = Specialization.objects.create(name=f'Specialization {n}', created_by=self.admin)
+        lawyer.specializations.add(specialization)
+        return Case.objects.create(
+            title=f'Case {n}', description='Description', client=client,
+            lawyer=lawyer, specialization=specialization
+        )
+
+
+class CaseListingQueryTests(CaseTestCase):
+    """
+    Serializing a case listing must not issue queries per case
+    """
+
+    def count_listing_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            CaseSerializer(Case.objects.for_listing(), many=True).data
+        return len(context.captured_queries)
+
+    def test_listing_query_count_is_constant(self):
+        self.make_case()
+        single = self.count_listing_queries()
+
+        for _ in range(5):
+            self.make_case()
+        many = self.count_listing_queries()
+
+        self.assertEqual(single, many)
+        self.assertEqual(many, 2)
+
+
+class CasePaginationTests(CaseTestCase):
+    """
+    Case listings page by (created_at, id) cursors
+    """
+
+    def test_pages_are_stable(self):
+        from datetime import timedelta
+        from django.utils.timezone import now
+        from rest_framework.test import APIClient
+
+        cases = [self.make_case() for _ in range(5)]
+        # The middle three share a timestamp that straddles the page boundary
+        start = now() - timedelta(hours=1)
+        for case, minutes in zip(cases, (0, 1, 1, 1, 2)):
+            Case.objects.filter(pk=case.pk).update(created_at=start + timedelta(minutes=minutes))
+        api = APIClient()
+        api.force_authenticate(self.admin)
+
+        body = api.get('/case/cases/', {'page_size': 2}).json()
+        self.assertEqual(len(body['results']), 2)
+        seen = [case['id'] for case in body['results']]
 
-# Create your tests here.
+        # A case added after the first page does not shift the later ones
+        self.make_case()
+        while body['next']:
+            body = api.get(body['next']).json()
+            self.assertLessEqual(len(body['results']), 2)
+            seen += [case['id'] for case in body['results']]
+        self.assertEqual(seen, sorted((case.id for case in cases), reverse=True))
@@ -21,6 +21,10 @@ urlpatterns = [
     path('update/<int:case_id>/', views.update_case, name='update_case'),  # Update a case
     path('status/<int:case_id>/', views.update_case_status, name='update_case_status'),  # Update case status
     
+    # Lawyer matching endpoints
+    path('<int:case_id>/matches/', views.get_case_lawyer_matches, name='get_case_lawyer_matches'),  # Rank lawyers for a case (admin only)
+    path('auto-assign/', views.auto_assign_cases, name='auto_assign_cases'),  # Assign the pending backlog (admin only)
+    
     # Case deletion endpoint
     path('delete/<int:case_id>/', views.delete_case, name='delete_case'),  # Delete a case (admin only)
     path('lawyer/partner-clients/', views.lawyer_partner_clients, name='lawyer-partner-clients'),
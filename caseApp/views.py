@@ -3,7 +3,6 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
 from django.conf import settings
 from django.db import transaction
 from django.template.loader import render_to_string
@@ -12,6 +11,8 @@ from django.template.loader import render_to_string
 from caseApp.models import Case
 from clientApp.models import Client
 from professionalApp.models import Lawyer
+from emailApp.services import queue_email
+from userApp.services import get_admin_emails
 from .serializers import (
     CaseSerializer, 
     CaseCreateSerializer, 
@@ -19,6 +20,8 @@ from .serializers import (
     CaseStatusUpdateSerializer,
     ClientSerializer
 )
+from .pagination import CaseCursorPagination
+from .matching import rank_lawyers, auto_assign_pending_cases
 
 
 
@@ -36,12 +39,7 @@ def send_case_notification(case):
         recipients.append(case.lawyer.user.email)
     
     # Add admins
-    admin_emails = [
-        admin.email for admin in 
-        case.client.user.__class__.objects.filter(role='admin', is_active=True)
-        if admin.email
-    ]
-    recipients.extend(admin_emails)
+    recipients.extend(get_admin_emails())
     
     # Prepare email content
     subject = f"Case Notification: {case.case_number}"
@@ -72,21 +70,28 @@ def send_case_notification(case):
     Lawyer: {context['lawyer_name']}
     """
     
-    # Send email
+    # Queue email for background delivery
     try:
-        send_mail(
+        queue_email(
             subject=subject,
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=recipients,
             html_message=html_message,
-            fail_silently=False,
         )
         return True
     except Exception as e:
-        print(f"Email sending failed: {str(e)}")
+        print(f"Email queueing failed: {str(e)}")
         return False
 
+def paginated_case_response(request, cases):
+    """Serialize one cursor page of a case listing"""
+    paginator = CaseCursorPagination()
+    page = paginator.paginate_queryset(cases, request)
+    serializer = CaseSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_case(request):
@@ -376,9 +381,8 @@ def get_client_cases(request):
     
     try:
         client = Client.objects.get(user=user)
-        cases = Case.objects.filter(client=client)
-        serializer = CaseSerializer(cases, many=True)
-        return Response(serializer.data)
+        cases = Case.objects.filter(client=client).for_listing()
+        return paginated_case_response(request, cases)
     
     except Client.DoesNotExist:
         return Response(
@@ -407,9 +411,8 @@ def get_cases_by_client_id(request, client_id):
     
     try:
         client = get_object_or_404(Client, id=client_id)
-        cases = Case.objects.filter(client=client)
-        serializer = CaseSerializer(cases, many=True)
-        return Response(serializer.data)
+        cases = Case.objects.filter(client=client).for_listing()
+        return paginated_case_response(request, cases)
     
     except Exception as e:
         return Response(
@@ -433,9 +436,8 @@ def get_lawyer_cases(request):
     
     try:
         lawyer = Lawyer.objects.get(user=user)
-        cases = Case.objects.filter(lawyer=lawyer)
-        serializer = CaseSerializer(cases, many=True)
-        return Response(serializer.data)
+        cases = Case.objects.filter(lawyer=lawyer).for_listing()
+        return paginated_case_response(request, cases)
     
     except Lawyer.DoesNotExist:
         return Response(
@@ -464,9 +466,8 @@ def get_all_cases(request):
         )
     
     try:
-        cases = Case.objects.all()
-        serializer = CaseSerializer(cases, many=True)
-        return Response(serializer.data)
+        cases = Case.objects.for_listing()
+        return paginated_case_response(request, cases)
     
     except Exception as e:
         return Response(
@@ -491,9 +492,8 @@ def get_cases_by_lawyer_id(request, lawyer_id):
     
     try:
         lawyer = get_object_or_404(Lawyer, id=lawyer_id)
-        cases = Case.objects.filter(lawyer=lawyer)
-        serializer = CaseSerializer(cases, many=True)
-        return Response(serializer.data)
+        cases = Case.objects.filter(lawyer=lawyer).for_listing()
+        return paginated_case_response(request, cases)
     
     except Exception as e:
         return Response(
@@ -557,7 +557,11 @@ def update_case(request, case_id):
         
         serializer = CaseUpdateSerializer(case, data=data, partial=True)
         if serializer.is_valid():
-            updated_case = serializer.save()
+            with transaction.atomic():
+                # Lock the case so its lawyer's workload counters move from
+                # the status it really had
+                serializer.instance = Case.objects.select_for_update().get(pk=case.pk)
+                updated_case = serializer.save()
             
             # Send notification email if significant changes
             if set(data.keys()) - {'attachment'}:
@@ -592,8 +596,9 @@ def delete_case(request, case_id):
         case = get_object_or_404(Case, id=case_id)
         case_number = case.case_number  # Save for response
         
-        # Delete the case
-        case.delete()
+        # Delete the case and drop it from its lawyer's workload together
+        with transaction.atomic():
+            Case.objects.select_for_update().get(pk=case.pk).delete()
         
         return Response(
             {"message": f"Case {case_number} has been deleted successfully."},
@@ -669,7 +674,10 @@ def update_case_status(request, case_id):
         
         serializer = CaseStatusUpdateSerializer(case, data=request.data, partial=True)
         if serializer.is_valid():
-            updated_case = serializer.save()
+            with transaction.atomic():
+                # Status and workload counters change together (see update_case)
+                serializer.instance = Case.objects.select_for_update().get(pk=case.pk)
+                updated_case = serializer.save()
             
             # Send notification email
             send_case_notification(updated_case)
@@ -684,10 +692,91 @@ def update_case_status(request, case_id):
             {"error": f"An error occurred: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_case_lawyer_matches(request, case_id):
+    """Rank eligible lawyers for a case (admin only)"""
+    user = request.user
+    
+    if user.role != 'admin':
+        return Response(
+            {"error": "Only admins can match lawyers to cases."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        case = get_object_or_404(Case.objects.select_related('client'), id=case_id)
+        limit = min(int(request.query_params.get('limit', 10)), 50)
+        
+        matches = []
+        for lawyer in rank_lawyers(case, limit=limit):
+            middle = f" {lawyer.middle_name}" if lawyer.middle_name else ""
+            matches.append({
+                'lawyer_id': lawyer.id,
+                'full_name': f"{lawyer.first_name}{middle} {lawyer.last_name}",
+                'user_phone': lawyer.user.phone_number,
+                'residence_district': lawyer.residence_district,
+                'years_of_experience': lawyer.years_of_experience,
+                'open_cases': lawyer.open_cases,
+                'specialization_match': bool(lawyer.specialization_match),
+                'district_match': bool(lawyer.district_match),
+                'match_score': lawyer.match_score,
+            })
+        
+        return Response({
+            'case_id': case.id,
+            'case_number': case.case_number,
+            'matches': matches
+        }, status=status.HTTP_200_OK)
+    
+    except ValueError:
+        return Response(
+            {"error": "limit must be a number."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {"error": f"An error occurred: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def auto_assign_cases(request):
+    """Assign the best matching lawyer to pending, unassigned cases (admin only)"""
+    user = request.user
+    
+    if user.role != 'admin':
+        return Response(
+            {"error": "Only admins can auto-assign cases."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        limit = min(int(request.data.get('limit', 100)), 500)
+        assigned, unassigned = auto_assign_pending_cases(limit=limit)
         
+        for case in assigned:
+            send_case_notification(case)
         
-        
-        
-        
-        
-        
\ No newline at end of file
+        return Response({
+            'assigned': [
+                {'case_id': case.id, 'case_number': case.case_number, 'lawyer_id': case.lawyer_id}
+                for case in assigned
+            ],
+            'unassigned': unassigned
+        }, status=status.HTTP_200_OK)
+    
+    except ValueError:
+        return Response(
+            {"error": "limit must be a number."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {"error": f"An error occurred: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -1,14 +1,14 @@
 # chatApp/admin.py
 from django.contrib import admin
-from .models import ChatRoom, Message, MessageReadStatus, ChatNotification
+from .models import ChatRoom, Message, MessageReadStatus, ChatNotification, ChatRoomReadCursor
 
 
 @admin.register(ChatRoom)
 class ChatRoomAdmin(admin.ModelAdmin):
-    list_display = ['id', 'case', 'client', 'lawyer', 'is_active', 'created_at', 'updated_at']
+    list_display = ['id', 'case', 'client', 'lawyer', 'is_active', 'message_count', 'last_message_at', 'created_at', 'updated_at']
     list_filter = ['is_active', 'created_at', 'updated_at']
     search_fields = ['case__case_number', 'client__first_name', 'client__last_name', 'lawyer__first_name', 'lawyer__last_name']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at'] + ChatRoom.COUNTER_FIELDS
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('case', 'client', 'lawyer')
@@ -47,4 +47,12 @@ class ChatNotificationAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('recipient', 'sender', 'chat_room')
\ No newline at end of file
+        return super().get_queryset(request).select_related('recipient', 'sender', 'chat_room')
+
+@admin.register(ChatRoomReadCursor)
+class ChatRoomReadCursorAdmin(admin.ModelAdmin):
+    list_display = ['chat_room', 'user', 'last_read_message_id', 'updated_at']
+    search_fields = ['user__phone_number', 'chat_room__case__case_number']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('chat_room', 'user')
@@ -1,5 +1,8 @@
 # chatApp/consumers.py
+import asyncio
 import json
+import time
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
@@ -8,6 +11,9 @@ from asgiref.sync import sync_to_async
 
 from .models import ChatRoom, Message, ChatNotification
 from .serializers import MessageSerializer
+from .writer import chat_write_buffer
+from .presence import get_presence, PRESENCE_REFRESH_INTERVAL
+from .utils import notification_payload
 from userApp.models import CustomUser
 from clientApp.models import Client
 from professionalApp.models import Lawyer
@@ -15,23 +21,27 @@ from professionalApp.models import Lawyer
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from rest_framework.authtoken.models import Token
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_name = self.scope['url_route']['kwargs']['chat_room_id']
         self.room_group_name = f'chat_{self.room_name}'
         
-        # Authenticate user
+        # User is resolved from the JWT by JWTAuthMiddleware
         try:
-            token = self.scope['query_string'].decode().split('=')[1]
-            user = await self.get_user(token)
+            user = self.scope.get('user')
             
             if not user or user.is_anonymous:
                 await self.close()
                 return
+            
+            # Resolve the room and check participation once per connection
+            self.chat_room = await self.get_chat_room(user)
+            if self.chat_room is None:
+                await self.close()
+                return
                 
-            self.scope['user'] = user
+            self.pending_writes = set()
             await self.accept()
             
             # Join room group
@@ -40,45 +50,163 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             
+            # Register presence, tell the room if the user just came online
+            # and give this socket the current online list once
+            await self.update_presence()
+            online_users = await sync_to_async(get_presence().online_users, thread_sensitive=False)(self.chat_room.id)
+            await self.send(text_data=json.dumps({
+                'type': 'presence_state',
+                'online_users': online_users
+            }))
+            
         except Exception as e:
             print(f"WebSocket connection error: {e}")
             await self.close()
 
-    @database_sync_to_async
-    def get_user(self, token):
+    async def update_presence(self):
+        """Register or refresh this socket and broadcast if the user came online"""
+        user_id = self.scope['user'].id
+        self.presence_refreshed_at = time.monotonic()
         try:
-            from rest_framework_simplejwt.tokens import AccessToken
-            access_token = AccessToken(token)
-            from userApp.models import CustomUser
-            return CustomUser.objects.get(id=access_token['user_id'])
+            came_online = await get_presence().heartbeat(self.chat_room.id, user_id, self.channel_name)
         except Exception as e:
-            print(f"Token validation error: {e}")
+            print(f"Presence update error: {e}")
+            return
+        self.presence_registered = True
+        if came_online:
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    'type': 'presence_update',
+                    'user_id': user_id,
+                    'status': 'online'
+                }
+            )
+
+    async def touch_presence(self):
+        """
+        Refresh presence on any client activity, at most once per
+        PRESENCE_REFRESH_INTERVAL, so sockets that send messages or typing
+        frames but no heartbeats stay online
+        """
+        if time.monotonic() - getattr(self, 'presence_refreshed_at', 0) >= PRESENCE_REFRESH_INTERVAL:
+            await self.update_presence()
+
+    @database_sync_to_async
+    def get_chat_room(self, user):
+        """Return the chat room if the user is one of its participants"""
+        try:
+            chat_room = ChatRoom.objects.select_related(
+                'case', 'client__user', 'lawyer__user'
+            ).get(id=self.room_name)
+        except (ChatRoom.DoesNotExist, ValueError):
+            return None
+        if user.id not in (chat_room.client.user_id, chat_room.lawyer.user_id):
             return None
+        return chat_room
+
+    async def send_chat_message(self, content, message_type, client_message_id):
+        """Persist a message, broadcast it to the room and ack it to the sender"""
+        try:
+            # Persist first so the broadcast carries the server id and timestamps
+            message = await chat_write_buffer.add_message(
+                self.chat_room, self.scope['user'], content, message_type
+            )
+        except Exception as e:
+            print(f"Error saving chat message: {e}")
+            await self.send_error('Message could not be saved', client_message_id)
+            return
+        
+        # Send message to room group
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'chat_message',
+                'message': message,
+                'sender_id': self.scope['user'].id
+            }
+        )
+        
+        # Acknowledge to the sender
+        await self.send(text_data=json.dumps({
+            'type': 'message_ack',
+            'client_message_id': client_message_id,
+            'message': {**message, 'is_own_message': True}
+        }, default=str))
 
     async def disconnect(self, close_code):
+        # Write out anything still buffered before the socket goes away
+        await chat_write_buffer.flush()
+        if getattr(self, 'pending_writes', None):
+            await asyncio.gather(*self.pending_writes, return_exceptions=True)
+        
+        # Drop presence and tell the room if this was the user's last socket
+        if getattr(self, 'presence_registered', False):
+            user_id = self.scope['user'].id
+            try:
+                went_offline = await get_presence().leave(self.chat_room.id, user_id, self.channel_name)
+            except Exception as e:
+                print(f"Presence update error: {e}")
+                went_offline = False
+            if went_offline:
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    {
+                        'type': 'presence_update',
+                        'user_id': user_id,
+                        'status': 'offline'
+                    }
+                )
+        
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
 
+    async def send_error(self, message, client_message_id=None):
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'message': message,
+            'client_message_id': client_message_id
+        }))
+
     async def receive(self, text_data):
         try:
             data = json.loads(text_data)
             
+            if data.get('type') in ('join', 'heartbeat'):
+                # Keep this socket's presence alive
+                await self.update_presence()
+                return
+            await self.touch_presence()
+            
             # Handle different message types
             if data.get('type') == 'chat_message':
-                message = data['message']
+                # Accept either {"message": "text"} or {"message": {"content": "text"}}
+                message = data.get('message')
+                if isinstance(message, dict):
+                    content = message.get('content')
+                    message_type = message.get('message_type', 'text')
+                else:
+                    content = message
+                    message_type = data.get('message_type', 'text')
+                client_message_id = data.get('client_message_id')
                 
-                # Send message to room group
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'chat_message',
-                        'message': message,
-                        'sender_id': self.scope['user'].id
-                    }
+                if not isinstance(content, str) or not content.strip():
+                    await self.send_error('Message content is required', client_message_id)
+                    return
+                if message_type != 'text':
+                    await self.send_error('Only text messages can be sent over the socket', client_message_id)
+                    return
+                
+                # Don't block the socket on the write, so a burst of frames
+                # can share one buffered flush
+                task = asyncio.ensure_future(
+                    self.send_chat_message(content, message_type, client_message_id)
                 )
+                self.pending_writes.add(task)
+                task.add_done_callback(self.pending_writes.discard)
             elif data.get('type') == 'video_call_offer':
                 # Forward video call offer to the room group
                 await self.channel_layer.group_send(
@@ -99,9 +227,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
                         'is_typing': data.get('is_typing')
                     }
                 )
-            elif data.get('type') == 'join':
-                # Handle user joining
-                pass  # You might want to handle this case
             
         except json.JSONDecodeError:
             pass
@@ -109,10 +234,35 @@ class ChatConsumer(AsyncWebsocketConsumer):
     # Handler for chat messages
     async def chat_message(self, event):
         """Send message to WebSocket"""
+        message = event['message']
+        sender_id = event.get('sender_id')
+        if sender_id is not None and isinstance(message, dict):
+            message = {**message, 'is_own_message': sender_id == self.scope['user'].id}
+        
         await self.send(text_data=json.dumps({
             'type': 'chat_message',
-            'message': event['message'],
-            'sender_id': event['sender_id']
+            'message': message,
+            'sender_id': sender_id
+        }, default=str))
+
+    # Handler for read receipts
+    async def messages_read(self, event):
+        """Send read receipt to WebSocket"""
+        await self.send(text_data=json.dumps({
+            'type': 'messages_read',
+            'user_id': event['user_id'],
+            'last_read_message_id': event['last_read_message_id'],
+            'read_count': event['read_count'],
+            'read_at': event['read_at']
+        }))
+
+    # Handler for presence changes
+    async def presence_update(self, event):
+        """Send presence change to WebSocket"""
+        await self.send(text_data=json.dumps({
+            'type': 'presence_update',
+            'user_id': event['user_id'],
+            'status': event['status']
         }))
 
     # Handler for video call offers
@@ -141,11 +291,21 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
-    """WebSocket consumer for real-time notifications"""
+    """
+    WebSocket consumer for real-time notifications.
+
+    Clients resume from the last notification id they have seen, either with
+    ?last_notification_id=N on connect or a {"type": "resume",
+    "last_notification_id": N} frame, and get everything newer in one
+    'notification_backlog' frame. The backlog is read after joining the user
+    group, so nothing created in between is lost (clients dedupe by id).
+    """
+    backlog_limit = 100
     
     async def connect(self):
-        # Check if user is authenticated
-        if self.scope['user'] == AnonymousUser():
+        # Check if user is authenticated (JWT or session, see JWTAuthMiddleware)
+        user = self.scope.get('user')
+        if not user or user.is_anonymous:
             await self.close()
             return
         
@@ -159,6 +319,11 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         )
         
         await self.accept()
+        
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        last_notification_id = query.get('last_notification_id', [None])[0]
+        if last_notification_id is not None:
+            await self.send_backlog(last_notification_id)
     
     async def disconnect(self, close_code):
         # Leave user group
@@ -176,6 +341,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             if message_type == 'mark_notification_read':
                 notification_id = data.get('notification_id')
                 await self.mark_notification_read(notification_id)
+            elif message_type == 'resume':
+                await self.send_backlog(data.get('last_notification_id'))
                 
         except json.JSONDecodeError:
             await self.send(text_data=json.dumps({
@@ -183,6 +350,46 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 'message': 'Invalid JSON'
             }))
     
+    async def send_backlog(self, last_notification_id):
+        """Send every notification newer than last_notification_id in one frame"""
+        try:
+            last_notification_id = int(last_notification_id or 0)
+        except (TypeError, ValueError):
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'last_notification_id must be an integer'
+            }))
+            return
+        
+        notifications, has_more, unread_count = await self.get_backlog(last_notification_id)
+        await self.send(text_data=json.dumps({
+            'type': 'notification_backlog',
+            'notifications': notifications,
+            'has_more': has_more,
+            'last_notification_id': notifications[-1]['id'] if notifications else last_notification_id,
+            'unread_count': unread_count
+        }))
+    
+    @database_sync_to_async
+    def get_backlog(self, last_notification_id):
+        """Oldest-first notifications after last_notification_id, capped at backlog_limit"""
+        user = self.scope['user']
+        notifications = list(
+            ChatNotification.objects.filter(
+                recipient=user,
+                id__gt=last_notification_id
+            ).select_related(
+                'chat_room__case', 'sender'
+            ).order_by('id')[:self.backlog_limit + 1]
+        )
+        has_more = len(notifications) > self.backlog_limit
+        unread_count = ChatNotification.objects.filter(recipient=user, is_read=False).count()
+        return (
+            [notification_payload(notification) for notification in notifications[:self.backlog_limit]],
+            has_more,
+            unread_count
+        )
+    
     # WebSocket message handlers
     async def notification_message(self, event):
         await self.send(text_data=json.dumps(event))
@@ -197,4 +404,4 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             notification.is_read = True
             notification.save(update_fields=['is_read'])
         except ChatNotification.DoesNotExist:
-            pass
\ No newline at end of file
+            pass
@@ -0,0 +1,113 @@
+# chatApp/dispatch.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+
+class NotificationDispatcher:
+    """
+    Deferred fan-out of realtime notification pushes and room broadcasts.
+
+    push() and broadcast() only record a (group, event) pair; it is
+    collected once the surrounding transaction commits and dropped if it
+    rolls back. Events collected inside batch() (every HTTP request, see
+    NotificationBatchMiddleware) go out together when the batch ends,
+    everything else as soon as it is collected. With the Redis channel
+    layer the group_sends run on a background thread, so a slow or
+    unreachable Redis never holds up the request. The in-memory layer is
+    bound to the server's event loop, so there they are sent inline.
+    """
+
+    def __init__(self, background=None):
+        self.background = background
+        self._local = threading.local()
+        self._executor = None
+
+    def push(self, user_id, payload):
+        """Send payload to the user's notification sockets once committed"""
+        self.push_many([(user_id, payload)])
+
+    def push_many(self, pushes):
+        """Like push() for a list of (user_id, payload) pairs"""
+        self.send_on_commit([
+            (
+                f"user_{user_id}",
+                {
+                    'type': 'notification_message',
+                    'notification': payload
+                }
+            )
+            for user_id, payload in pushes
+        ])
+
+    def broadcast(self, group, event):
+        """Send event to a channel layer group (e.g. a chat room) once committed"""
+        self.send_on_commit([(group, event)])
+
+    def send_on_commit(self, events):
+        if events:
+            transaction.on_commit(lambda: self.collect(events))
+
+    def collect(self, events):
+        batch = getattr(self._local, 'batch', None)
+        if batch is not None:
+            batch.extend(events)
+        else:
+            self.dispatch(events)
+
+    @contextmanager
+    def batch(self):
+        """Hold back collected events and dispatch them as one batch on exit"""
+        if getattr(self._local, 'batch', None) is not None:
+            # Nested batches join the outer one
+            yield
+            return
+
+        self._local.batch = []
+        try:
+            yield
+        finally:
+            events, self._local.batch = self._local.batch, None
+            if events:
+                self.dispatch(events)
+
+    def dispatch(self, events):
+        if self.in_background():
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notification-push')
+            self._executor.submit(self.send, events)
+        else:
+            self.send(events)
+
+    def in_background(self):
+        if self.background is None:
+            layer = settings.CHANNEL_LAYERS.get('default', {})
+            self.background = getattr(
+                settings, 'CHAT_NOTIFICATION_PUSH_IN_BACKGROUND', 'Redis' in layer.get('BACKEND', '')
+            )
+        return self.background
+
+    def send(self, events):
+        try:
+            async_to_sync(self.group_send_all)(events)
+        except Exception as e:
+            print(f"Error sending realtime notifications: {e}")
+
+    async def group_send_all(self, events):
+        channel_layer = get_channel_layer()
+        results = await asyncio.gather(*(
+            channel_layer.group_send(group, event)
+            for group, event in events
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Error sending realtime notification: {result}")
+
+
+notification_dispatcher = NotificationDispatcher()
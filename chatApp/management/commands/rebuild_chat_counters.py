@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from chatApp.models import ChatRoom
+
+
+class Command(BaseCommand):
+    help = 'Recompute every chat room\'s message counters and last-message pointer from its messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, action='append', dest='rooms', help='Only rebuild this chat room (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rooms updated per query')
+
+    def handle(self, *args, **options):
+        chat_rooms = ChatRoom.objects.all()
+        if options['rooms']:
+            chat_rooms = chat_rooms.filter(pk__in=options['rooms'])
+
+        updated = chat_rooms.rebuild_counters(batch_size=options['batch_size'])
+        self.stdout.write(f"Rebuilt counters for {updated} chat room(s)")
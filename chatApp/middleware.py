@@ -0,0 +1,167 @@
+# chatApp/middleware.py
+import asyncio
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+
+
+JWT_USER_CACHE_TTL = getattr(settings, 'CHAT_JWT_USER_CACHE_TTL', 300)  # seconds
+JWT_USER_CACHE_SIZE = getattr(settings, 'CHAT_JWT_USER_CACHE_SIZE', 10000)
+
+
+class JWTUserCache:
+    """
+    Bounded LRU cache of token jti -> user with a per-entry expiry.
+    An entry never outlives its token, nor JWT_USER_CACHE_TTL, so
+    deactivated users drop out within that window.
+    """
+
+    def __init__(self, ttl=JWT_USER_CACHE_TTL, max_size=JWT_USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()  # jti -> (user, expires_at)
+        self.in_flight = {}  # jti -> Future for lookups already running
+
+    def get(self, jti):
+        entry = self.entries.get(jti)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self.entries[jti]
+            return None
+        self.entries.move_to_end(jti)
+        return user
+
+    def set(self, jti, user, token_exp):
+        self.entries[jti] = (user, min(time.time() + self.ttl, token_exp))
+        self.entries.move_to_end(jti)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+jwt_user_cache = JWTUserCache()
+
+
+def get_token_from_scope(scope):
+    """Read the access token from ?token=... or an 'Authorization: Bearer' header"""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    token = query.get('token', [None])[0]
+    if token:
+        return token
+
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] in settings.SIMPLE_JWT.get('AUTH_HEADER_TYPES', ('Bearer',)):
+                return parts[1]
+    return None
+
+
+@database_sync_to_async
+def load_user(user_id):
+    from userApp.models import CustomUser
+
+    try:
+        return CustomUser.objects.get(id=user_id, is_active=True)
+    except CustomUser.DoesNotExist:
+        return None
+
+
+async def get_user_for_token(raw_token):
+    """
+    Validate an access token and resolve its user, going to the database
+    only on a cache miss. Concurrent misses for one token share one lookup.
+    Returns None for invalid tokens and unknown or inactive users.
+    """
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return None
+
+    jti = token.get(api_settings.JTI_CLAIM) or raw_token
+    user = jwt_user_cache.get(jti)
+    if user is not None:
+        return user
+
+    future = jwt_user_cache.in_flight.get(jti)
+    if future is not None:
+        return await future
+
+    future = asyncio.get_running_loop().create_future()
+    jwt_user_cache.in_flight[jti] = future
+    try:
+        user = await load_user(token[api_settings.USER_ID_CLAIM])
+        if user is not None:
+            jwt_user_cache.set(jti, user, token['exp'])
+        future.set_result(user)
+    finally:
+        # If the lookup failed or this connect was cancelled, waiters treat
+        # the token as unauthenticated; this caller re-raises
+        if not future.done():
+            future.set_result(None)
+        del jwt_user_cache.in_flight[jti]
+    return user
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticate websocket connections with the same JWT access tokens as
+    the REST API. When a token is given, scope['user'] comes from it alone
+    and the session-based AuthMiddlewareStack is skipped, so reconnects
+    with a cached token never touch the database. Without a token the
+    session stack applies.
+    """
+
+    def __init__(self, inner):
+        super().__init__(inner)
+        self.session_inner = AuthMiddlewareStack(inner)
+
+    async def __call__(self, scope, receive, send):
+        raw_token = get_token_from_scope(scope)
+        if not raw_token:
+            return await self.session_inner(scope, receive, send)
+
+        from django.contrib.auth.models import AnonymousUser
+
+        try:
+            user = await get_user_for_token(raw_token)
+        except Exception as e:
+            print(f"Token authentication error: {e}")
+            user = None
+
+        scope = dict(scope)
+        scope['user'] = user or AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+
+def JWTAuthMiddlewareStack(inner):
+    return JWTAuthMiddleware(inner)
+
+
+class NotificationBatchMiddleware:
+    """
+    Send the realtime notification pushes of an HTTP request as one batch
+    once the response is ready (see chatApp.dispatch)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from .dispatch import notification_dispatcher
+
+        with notification_dispatcher.batch():
+            return self.get_response(request)
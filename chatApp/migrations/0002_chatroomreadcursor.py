@@ -0,0 +1,57 @@
+# Generated by Django 4.2.17 on 2026-10-17 02:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def seed_read_cursors(apps, schema_editor):
+    """
+    Start each participant's cursor after the newest message they had already
+    read under the old per-message is_read flag
+    """
+    ChatRoom = apps.get_model('chatApp', 'ChatRoom')
+    Message = apps.get_model('chatApp', 'Message')
+    ChatRoomReadCursor = apps.get_model('chatApp', 'ChatRoomReadCursor')
+
+    cursors = []
+    for chat_room in ChatRoom.objects.select_related('client', 'lawyer'):
+        for user_id in (chat_room.client.user_id, chat_room.lawyer.user_id):
+            last_read = Message.objects.filter(
+                chat_room=chat_room,
+                is_read=True
+            ).exclude(sender_id=user_id).aggregate(last=models.Max('id'))['last']
+            if last_read:
+                cursors.append(ChatRoomReadCursor(
+                    chat_room=chat_room,
+                    user_id=user_id,
+                    last_read_message_id=last_read
+                ))
+    ChatRoomReadCursor.objects.bulk_create(cursors, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chatApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatRoomReadCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chat_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_cursors', to='chatApp.chatroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_read_cursors', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Chat Room Read Cursor',
+                'verbose_name_plural': 'Chat Room Read Cursors',
+                'unique_together': {('chat_room', 'user')},
+            },
+        ),
+        migrations.RunPython(seed_read_cursors, migrations.RunPython.noop),
+    ]
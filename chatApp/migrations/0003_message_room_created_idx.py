@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-17 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatApp', '0002_chatroomreadcursor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat_room', 'created_at', 'id'], name='message_room_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-17 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatApp', '0003_message_room_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatnotification',
+            name='message_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.17 on 2026-10-17 03:10
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import migrations
+
+
+SYSTEM_USER_PHONE = 'system'
+
+
+def create_system_user(apps, schema_editor):
+    """
+    Sender of automated chat messages. It cannot log in and, being inactive,
+    is left out of the admin notification emails.
+    """
+    CustomUser = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    user, created = CustomUser.objects.get_or_create(
+        phone_number=SYSTEM_USER_PHONE,
+        defaults={
+            'role': 'admin',
+            'email': 'system@example.com',
+            'password': make_password(None),
+            'is_active': False,
+        }
+    )
+    if not created and user.is_active:
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chatApp', '0004_chatnotification_message_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_system_user, migrations.RunPython.noop),
+    ]
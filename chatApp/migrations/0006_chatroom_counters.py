@@ -0,0 +1,74 @@
+# Generated by Django 4.2.17 on 2026-10-17 02:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Compute the new per-room counters for existing rooms (the same numbers
+    `manage.py rebuild_chat_counters` produces)
+    """
+    ChatRoom = apps.get_model('chatApp', 'ChatRoom')
+    Message = apps.get_model('chatApp', 'Message')
+    ChatRoomReadCursor = apps.get_model('chatApp', 'ChatRoomReadCursor')
+
+    cursors = {
+        (cursor.chat_room_id, cursor.user_id): cursor.last_read_message_id
+        for cursor in ChatRoomReadCursor.objects.all()
+    }
+    rooms = []
+    for chat_room in ChatRoom.objects.select_related('client', 'lawyer'):
+        messages = Message.objects.filter(chat_room=chat_room, is_deleted=False)
+        last = messages.order_by('-id').first()
+        chat_room.message_count = messages.count()
+        chat_room.last_message = last
+        chat_room.last_message_at = last.created_at if last else None
+        for participant in ('client', 'lawyer'):
+            user_id = getattr(chat_room, participant).user_id
+            unread = messages.exclude(sender_id=user_id).filter(
+                id__gt=cursors.get((chat_room.id, user_id), 0)
+            ).count()
+            setattr(chat_room, f'{participant}_unread_count', unread)
+        rooms.append(chat_room)
+    ChatRoom.objects.bulk_update(
+        rooms,
+        ['message_count', 'last_message', 'last_message_at', 'client_unread_count', 'lawyer_unread_count'],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatApp', '0005_system_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='client_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chatApp.message'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='lawyer_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
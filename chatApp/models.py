@@ -1,5 +1,6 @@
 # chatApp/models.py
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils.timezone import now
 from userApp.models import CustomUser
 from caseApp.models import Case
@@ -7,6 +8,93 @@ from clientApp.models import Client
 from professionalApp.models import Lawyer
 
 
+def count_subquery(queryset):
+    """COUNT(*) of a queryset as a scalar subquery expression"""
+    return Coalesce(
+        models.Subquery(
+            queryset.order_by().annotate(
+                total=models.Func(models.F('pk'), function='COUNT', output_field=models.IntegerField())
+            ).values('total')[:1]
+        ),
+        0
+    )
+
+
+class ChatRoomQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for chat rooms
+    """
+
+    def for_inbox(self, user):
+        """
+        Join the case, participants and last message and annotate the user's
+        unread count from the room counters, so ChatRoomSerializer needs no
+        per-room queries
+        """
+        return self.select_related(
+            'case',
+            'client__user',
+            'lawyer__user'
+        ).annotate(
+            last_message_content=models.F('last_message__content'),
+            last_message_sender=models.F('last_message__sender__phone_number'),
+            last_message_created_at=models.F('last_message__created_at'),
+            last_message_type=models.F('last_message__message_type'),
+            unread_messages=self.unread_counter(user),
+        )
+
+    @staticmethod
+    def unread_counter(user):
+        """Expression picking the user's unread counter in rooms they take part in"""
+        return models.Case(
+            models.When(client__user=user, then=models.F('client_unread_count')),
+            default=models.F('lawyer_unread_count')
+        )
+
+    def rebuild_counters(self, batch_size=500):
+        """
+        Recompute the message counters and last-message pointer of these rooms
+        from the Message table. Returns the number of rooms updated.
+        """
+        messages = Message.objects.filter(chat_room=models.OuterRef('pk'), is_deleted=False)
+        latest = messages.order_by('-id')
+
+        def unread_for(participant):
+            last_read = ChatRoomReadCursor.objects.filter(
+                chat_room=models.OuterRef(models.OuterRef('pk')),
+                user=models.OuterRef(models.OuterRef(f'{participant}__user'))
+            ).values('last_read_message_id')[:1]
+            return count_subquery(
+                messages.exclude(
+                    sender=models.OuterRef(f'{participant}__user')
+                ).filter(id__gt=Coalesce(models.Subquery(last_read), 0))
+            )
+
+        rooms = self.annotate(
+            computed_message_count=count_subquery(messages),
+            computed_last_message_id=models.Subquery(latest.values('id')[:1]),
+            computed_last_message_at=models.Subquery(latest.values('created_at')[:1]),
+            computed_client_unread=unread_for('client'),
+            computed_lawyer_unread=unread_for('lawyer'),
+        ).order_by('pk')
+
+        updated = 0
+        batch = []
+        for room in rooms.iterator(chunk_size=batch_size):
+            room.message_count = room.computed_message_count
+            room.last_message_id = room.computed_last_message_id
+            room.last_message_at = room.computed_last_message_at
+            room.client_unread_count = room.computed_client_unread
+            room.lawyer_unread_count = room.computed_lawyer_unread
+            batch.append(room)
+            if len(batch) >= batch_size:
+                updated += self.model.objects.bulk_update(batch, self.model.COUNTER_FIELDS)
+                batch = []
+        if batch:
+            updated += self.model.objects.bulk_update(batch, self.model.COUNTER_FIELDS)
+        return updated
+
+
 class ChatRoom(models.Model):
     """
     Chat room for a specific case between client and lawyer
@@ -30,6 +118,27 @@ class ChatRoom(models.Model):
     created_at = models.DateTimeField(default=now)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Summary of the room's messages, kept up to date by record_messages()
+    # and mark_messages_read(); rebuild with `manage.py rebuild_chat_counters`
+    last_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    message_count = models.PositiveIntegerField(default=0)
+    client_unread_count = models.PositiveIntegerField(default=0)
+    lawyer_unread_count = models.PositiveIntegerField(default=0)
+    
+    COUNTER_FIELDS = [
+        'last_message', 'last_message_at', 'message_count',
+        'client_unread_count', 'lawyer_unread_count'
+    ]
+    
+    objects = ChatRoomQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-updated_at']
         verbose_name = 'Chat Room'
@@ -46,6 +155,56 @@ class ChatRoom(models.Model):
     def get_participants(self):
         """Get all participants in the chat room"""
         return [self.client.user, self.lawyer.user]
+    
+    def get_last_read_message_id(self, user):
+        """Id of the newest message the user has read in this room (0 if none)"""
+        return self.read_cursors.filter(user=user).values_list(
+            'last_read_message_id', flat=True
+        ).first() or 0
+    
+    def unread_field_for(self, user):
+        """Name of the user's unread counter"""
+        if user.id == self.client.user_id:
+            return 'client_unread_count'
+        return 'lawyer_unread_count'
+    
+    def unread_count_for(self, user):
+        """Number of messages from other participants past the user's read cursor"""
+        return getattr(self, self.unread_field_for(user))
+    
+    def record_messages(self, messages):
+        """
+        Add newly stored messages of this room to its counters and move the
+        last-message pointer, in one UPDATE that is safe against concurrent
+        writers. Every participant other than a message's sender gets it as
+        unread (both of them for system messages).
+        """
+        last = max(messages, key=lambda message: message.id)
+        client_user_id = self.client.user_id
+        lawyer_user_id = self.lawyer.user_id
+        is_newer = models.Q(last_message__isnull=True) | models.Q(last_message_id__lt=last.id)
+        
+        ChatRoom.objects.filter(pk=self.pk).update(
+            message_count=models.F('message_count') + len(messages),
+            client_unread_count=models.F('client_unread_count') + sum(
+                1 for message in messages if message.sender_id != client_user_id
+            ),
+            lawyer_unread_count=models.F('lawyer_unread_count') + sum(
+                1 for message in messages if message.sender_id != lawyer_user_id
+            ),
+            # MySQL applies SET assignments left to right, so last_message_at
+            # must be set while is_newer still sees the old last_message
+            last_message_at=models.Case(
+                models.When(is_newer, then=models.Value(last.created_at)),
+                default=models.F('last_message_at')
+            ),
+            last_message=models.Case(
+                models.When(is_newer, then=models.Value(last.id)),
+                default=models.F('last_message'),
+                output_field=models.BigIntegerField()
+            ),
+            updated_at=now()
+        )
 
 
 class Message(models.Model):
@@ -86,6 +245,9 @@ class Message(models.Model):
         ordering = ['created_at']
         verbose_name = 'Message'
         verbose_name_plural = 'Messages'
+        indexes = [
+            models.Index(fields=['chat_room', 'created_at', 'id'], name='message_room_created_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.phone_number} in {self.chat_room.case.case_number}"
@@ -123,6 +285,51 @@ class MessageReadStatus(models.Model):
         return f"{self.user.phone_number} read message at {self.read_at}"
 
 
+class ChatRoomReadCursor(models.Model):
+    """
+    How far a user has read in a chat room (high-watermark message id).
+    Messages in the room with a larger id, sent by someone else, are unread.
+    """
+    chat_room = models.ForeignKey(
+        ChatRoom,
+        on_delete=models.CASCADE,
+        related_name='read_cursors'
+    )
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='chat_read_cursors'
+    )
+    last_read_message_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['chat_room', 'user']
+        verbose_name = 'Chat Room Read Cursor'
+        verbose_name_plural = 'Chat Room Read Cursors'
+    
+    def __str__(self):
+        return f"{self.user.phone_number} read up to {self.last_read_message_id} in room {self.chat_room_id}"
+    
+    @classmethod
+    def advance(cls, chat_room, user, message_id):
+        """
+        Move the user's cursor forward to message_id. Never moves it back, so
+        concurrent calls are safe. Returns True if the cursor moved.
+        """
+        cursor, created = cls.objects.get_or_create(
+            chat_room=chat_room,
+            user=user,
+            defaults={'last_read_message_id': message_id}
+        )
+        if created:
+            return message_id > 0
+        return cls.objects.filter(
+            pk=cursor.pk,
+            last_read_message_id__lt=message_id
+        ).update(last_read_message_id=message_id, updated_at=now()) > 0
+
+
 class ChatNotification(models.Model):
     """
     Notifications for chat events
@@ -153,6 +360,8 @@ class ChatNotification(models.Model):
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
     title = models.CharField(max_length=200)
     message = models.TextField()
+    # Number of messages a coalesced new_message notification stands for
+    message_count = models.PositiveIntegerField(default=1)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=now)
     
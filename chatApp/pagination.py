@@ -0,0 +1,72 @@
+# chatApp/pagination.py
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class MessageCursorPagination(BasePagination):
+    """
+    Bidirectional keyset pagination for chat history.
+
+    - no parameters: the latest `limit` messages
+    - ?before=<message id>: the `limit` messages just older than that message
+    - ?after=<message id>: the `limit` messages just newer than that message
+
+    Pages are always returned oldest first and seek on (created_at, id), so
+    every page costs the same whatever its depth.
+    """
+    default_limit = 50
+    max_limit = 200
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except (TypeError, ValueError):
+            raise ValidationError({'limit': 'limit must be an integer'})
+        return max(1, min(limit, self.max_limit))
+
+    def get_anchor(self, queryset, request, param):
+        message_id = request.query_params.get(param)
+        if message_id is None:
+            return None
+        try:
+            return queryset.select_related(None).only('id', 'created_at').get(id=int(message_id))
+        except (TypeError, ValueError, queryset.model.DoesNotExist):
+            raise ValidationError({param: 'Message not found in this chat room'})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = self.get_limit(request)
+        before = self.get_anchor(queryset, request, 'before')
+        after = self.get_anchor(queryset, request, 'after')
+
+        if after is not None:
+            page = list(queryset.filter(
+                Q(created_at__gt=after.created_at) |
+                Q(created_at=after.created_at, id__gt=after.id)
+            ).order_by('created_at', 'id')[:limit + 1])
+            self.has_more_after = len(page) > limit
+            self.has_more_before = True
+            page = page[:limit]
+        else:
+            if before is not None:
+                queryset = queryset.filter(
+                    Q(created_at__lt=before.created_at) |
+                    Q(created_at=before.created_at, id__lt=before.id)
+                )
+            page = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+            self.has_more_before = len(page) > limit
+            self.has_more_after = before is not None
+            page = page[:limit][::-1]
+
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'has_more_before': self.has_more_before,
+            'has_more_after': self.has_more_after,
+            'before': self.page[0].id if self.page else None,
+            'after': self.page[-1].id if self.page else None,
+        })
@@ -0,0 +1,200 @@
+# chatApp/presence.py
+import asyncio
+import time
+
+from django.conf import settings
+
+
+PRESENCE_TTL = getattr(settings, 'CHAT_PRESENCE_TTL', 60)  # seconds without a heartbeat before a socket counts as gone
+PRESENCE_REFRESH_INTERVAL = PRESENCE_TTL / 3  # seconds between presence refreshes from ordinary frames
+
+
+class RedisPresence:
+    """
+    Presence tracking on the Redis server used by the channel layer.
+
+    Every socket is a member of two sorted sets scored by its expiry time:
+    one per (room, user) and one per user. A per-room sorted set maps online
+    user ids to their latest expiry, so "who is online in this room" and
+    "is this user watching this room" are single lookups. Sockets that stop
+    heartbeating simply age out.
+
+    join/heartbeat/leave are async (called from consumers); the queries are
+    sync so request handlers and signal code can use them directly.
+    """
+
+    def __init__(self, host, prefix='presence'):
+        self.host = host
+        self.prefix = prefix
+        self._client = None
+        self._async_client = None
+        self._async_loop = None
+
+    def room_key(self, room_id):
+        return f"{self.prefix}:room:{room_id}"
+
+    def member_key(self, room_id, user_id):
+        return f"{self.prefix}:room:{room_id}:user:{user_id}"
+
+    def user_key(self, user_id):
+        return f"{self.prefix}:user:{user_id}"
+
+    def connection_kwargs(self):
+        if isinstance(self.host, dict):
+            return dict(self.host)
+        if isinstance(self.host, str):
+            return {'url': self.host}
+        host, port = self.host
+        return {'host': host, 'port': port}
+
+    def client(self):
+        if self._client is None:
+            import redis
+
+            kwargs = self.connection_kwargs()
+            if 'url' in kwargs:
+                self._client = redis.Redis.from_url(kwargs.pop('url'), **kwargs)
+            else:
+                self._client = redis.Redis(**kwargs)
+        return self._client
+
+    def async_client(self):
+        # redis.asyncio clients are bound to the loop they were created on
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            import redis.asyncio
+
+            kwargs = self.connection_kwargs()
+            if 'url' in kwargs:
+                self._async_client = redis.asyncio.Redis.from_url(kwargs.pop('url'), **kwargs)
+            else:
+                self._async_client = redis.asyncio.Redis(**kwargs)
+            self._async_loop = loop
+        return self._async_client
+
+    async def join(self, room_id, user_id, channel_name):
+        """
+        Register (or refresh) a socket. Returns True if the user was not
+        online in the room before.
+        """
+        now_ts = time.time()
+        expires = now_ts + PRESENCE_TTL
+        member_key = self.member_key(room_id, user_id)
+        room_key = self.room_key(room_id)
+        user_key = self.user_key(user_id)
+
+        async with self.async_client().pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(member_key, '-inf', now_ts)
+            pipe.zcard(member_key)
+            pipe.zadd(member_key, {channel_name: expires})
+            pipe.expire(member_key, PRESENCE_TTL)
+            pipe.zadd(room_key, {user_id: expires})
+            pipe.expire(room_key, PRESENCE_TTL)
+            pipe.zadd(user_key, {channel_name: expires})
+            pipe.expire(user_key, PRESENCE_TTL)
+            results = await pipe.execute()
+        return results[1] == 0
+
+    heartbeat = join
+
+    async def leave(self, room_id, user_id, channel_name):
+        """
+        Unregister a socket. Returns True if the user has no other live
+        socket in the room.
+        """
+        now_ts = time.time()
+        member_key = self.member_key(room_id, user_id)
+        client = self.async_client()
+
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zrem(member_key, channel_name)
+            pipe.zremrangebyscore(member_key, '-inf', now_ts)
+            pipe.zcard(member_key)
+            pipe.zrem(self.user_key(user_id), channel_name)
+            results = await pipe.execute()
+
+        if results[2] == 0:
+            await client.zrem(self.room_key(room_id), user_id)
+            return True
+        return False
+
+    def online_users(self, room_id):
+        """Ids of users with a live socket in the room"""
+        return [
+            int(user_id) for user_id in
+            self.client().zrangebyscore(self.room_key(room_id), time.time(), '+inf')
+        ]
+
+    def is_online(self, room_id, user_id):
+        """Whether the user has a live socket in the room"""
+        score = self.client().zscore(self.room_key(room_id), user_id)
+        return score is not None and score > time.time()
+
+    def is_user_online(self, user_id):
+        """Whether the user has a live chat socket in any room"""
+        return self.client().zcount(self.user_key(user_id), time.time(), '+inf') > 0
+
+
+class InMemoryPresence:
+    """
+    Single-process stand-in for RedisPresence, used with the in-memory
+    channel layer (development and tests)
+    """
+
+    def __init__(self):
+        self.members = {}  # (room_id, user_id) -> {channel_name: expires}
+        self.users = {}  # user_id -> {channel_name: expires}
+
+    def live(self, sockets):
+        now_ts = time.time()
+        for channel_name, expires in list(sockets.items()):
+            if expires <= now_ts:
+                del sockets[channel_name]
+        return sockets
+
+    async def join(self, room_id, user_id, channel_name):
+        sockets = self.live(self.members.setdefault((str(room_id), user_id), {}))
+        was_online = bool(sockets)
+        expires = time.time() + PRESENCE_TTL
+        sockets[channel_name] = expires
+        self.users.setdefault(user_id, {})[channel_name] = expires
+        return not was_online
+
+    heartbeat = join
+
+    async def leave(self, room_id, user_id, channel_name):
+        sockets = self.members.get((str(room_id), user_id), {})
+        sockets.pop(channel_name, None)
+        self.users.get(user_id, {}).pop(channel_name, None)
+        return not self.live(sockets)
+
+    def online_users(self, room_id):
+        return [
+            user_id for (member_room_id, user_id), sockets in self.members.items()
+            if member_room_id == str(room_id) and self.live(sockets)
+        ]
+
+    def is_online(self, room_id, user_id):
+        return bool(self.live(self.members.get((str(room_id), user_id), {})))
+
+    def is_user_online(self, user_id):
+        return bool(self.live(self.users.get(user_id, {})))
+
+
+_presence = None
+
+
+def get_presence():
+    """
+    Presence backend matching the default channel layer: Redis when the
+    channel layer is channels_redis, in-memory otherwise
+    """
+    global _presence
+    if _presence is None:
+        layer = settings.CHANNEL_LAYERS.get('default', {})
+        if 'Redis' in layer.get('BACKEND', ''):
+            hosts = layer.get('CONFIG', {}).get('hosts') or [('127.0.0.1', 6379)]
+            _presence = RedisPresence(hosts[0])
+        else:
+            _presence = InMemoryPresence()
+    return _presence
@@ -15,9 +15,10 @@ class UserBasicSerializer(serializers.ModelSerializer):
         fields = ['id', 'phone_number', 'email', 'role', 'full_name']
     
     def get_full_name(self, obj):
-        if hasattr(obj, 'client'):
+        # Check the role first so only the matching profile is ever looked up
+        if obj.role == 'customer' and hasattr(obj, 'client'):
             return f"{obj.client.first_name} {obj.client.last_name}"
-        elif hasattr(obj, 'lawyer'):
+        elif obj.role == 'lawyer' and hasattr(obj, 'lawyer'):
             return f"{obj.lawyer.first_name} {obj.lawyer.last_name}"
         return obj.phone_number
 
@@ -58,17 +59,8 @@ class MessageCreateSerializer(serializers.ModelSerializer):
             
         sender = self.context['request'].user
         
-        message = Message.objects.create(
-            chat_room=chat_room,
-            sender=sender,
-            **validated_data
-        )
-        
-        # Update chat room's updated_at timestamp
-        chat_room.updated_at = now()
-        chat_room.save(update_fields=['updated_at'])
-        
-        return message
+        from .utils import save_chat_message
+        return save_chat_message(chat_room, sender, **validated_data)
 
 class ChatRoomSerializer(serializers.ModelSerializer):
     case_title = serializers.CharField(source='case.title', read_only=True)
@@ -88,23 +80,37 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         ]
     
     def get_last_message(self, obj):
-        last_message = obj.messages.filter(is_deleted=False).last()
-        if last_message:
-            return {
-                'content': last_message.content[:50] + '...' if len(last_message.content) > 50 else last_message.content,
-                'sender': last_message.sender.phone_number,
-                'created_at': last_message.created_at,
-                'message_type': last_message.message_type
-            }
-        return None
+        # Rooms from ChatRoom.objects.for_inbox() carry the last message as annotations
+        if hasattr(obj, 'last_message_created_at'):
+            if obj.last_message_created_at is None:
+                return None
+            content = obj.last_message_content
+            sender = obj.last_message_sender
+            created_at = obj.last_message_created_at
+            message_type = obj.last_message_type
+        else:
+            last_message = obj.messages.filter(is_deleted=False).select_related('sender').order_by('-created_at', '-id').first()
+            if not last_message:
+                return None
+            content = last_message.content
+            sender = last_message.sender.phone_number
+            created_at = last_message.created_at
+            message_type = last_message.message_type
+        
+        return {
+            'content': content[:50] + '...' if len(content) > 50 else content,
+            'sender': sender,
+            'created_at': created_at,
+            'message_type': message_type
+        }
     
     def get_unread_count(self, obj):
+        if hasattr(obj, 'unread_messages'):
+            return obj.unread_messages
+        
         request = self.context.get('request')
         if request and request.user:
-            return obj.messages.filter(
-                is_deleted=False,
-                is_read=False
-            ).exclude(sender=request.user).count()
+            return obj.unread_count_for(request.user)
         return 0
 
 
@@ -116,5 +122,5 @@ class ChatNotificationSerializer(serializers.ModelSerializer):
         model = ChatNotification
         fields = [
             'id', 'sender', 'notification_type', 'title', 'message',
-            'is_read', 'created_at', 'case_number'
+            'message_count', 'is_read', 'created_at', 'case_number'
         ]
\ No newline at end of file
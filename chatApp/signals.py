@@ -1,19 +1,22 @@
 # chatApp/signals.py
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 
 from caseApp.models import Case
 from .models import ChatRoom, ChatNotification
+from .dispatch import notification_dispatcher
+from .utils import notification_payload, notify_chat_room_created, notify_case_status_changed
 
 
 @receiver(post_save, sender=Case)
-def create_chat_room_on_case_assignment(sender, instance, created, **kwargs):
+def create_chat_room_on_case_assignment(sender, instance, created, update_fields=None, **kwargs):
     """
     Automatically create a chat room when a case is assigned to a lawyer
     """
-    if not created and instance.lawyer and instance.status == 'assigned':
+    if created or not instance.has_changed('status', 'lawyer', update_fields=update_fields):
+        return
+    
+    if instance.lawyer and instance.status == 'assigned':
         # Check if chat room already exists
         if not hasattr(instance, 'chat_room'):
             # Create chat room
@@ -23,77 +26,25 @@ def create_chat_room_on_case_assignment(sender, instance, created, **kwargs):
                 lawyer=instance.lawyer
             )
             
-            # Create notifications for both parties
-            ChatNotification.objects.create(
-                recipient=instance.client.user,
-                chat_room=chat_room,
-                notification_type='case_assigned',
-                title=f'Chat room created for case {instance.case_number}',
-                message=f'You can now chat with your assigned lawyer'
-            )
-            
-            ChatNotification.objects.create(
-                recipient=instance.lawyer.user,
-                chat_room=chat_room,
-                notification_type='case_assigned',
-                title=f'Chat room created for case {instance.case_number}',
-                message=f'You can now chat with your client'
-            )
+            # Notify both parties in one insert
+            notify_chat_room_created(chat_room)
 
 
 @receiver(post_save, sender=Case)
-def notify_case_status_change(sender, instance, created, **kwargs):
+def notify_case_status_change(sender, instance, created, update_fields=None, **kwargs):
     """
     Send notification when case status changes
     """
-    if not created and hasattr(instance, 'chat_room'):
-        chat_room = instance.chat_room
-        
-        # Create notifications for both parties about status change
-        status_display = dict(Case.STATUS_CHOICES).get(instance.status, instance.status)
-        
-        ChatNotification.objects.create(
-            recipient=instance.client.user,
-            chat_room=chat_room,
-            notification_type='case_status_changed',
-            title=f'Case {instance.case_number} status updated',
-            message=f'Your case status has been changed to: {status_display}'
-        )
-        
-        if instance.lawyer:
-            ChatNotification.objects.create(
-                recipient=instance.lawyer.user,
-                chat_room=chat_room,
-                notification_type='case_status_changed',
-                title=f'Case {instance.case_number} status updated',
-                message=f'Case status has been changed to: {status_display}'
-            )
+    if (not created and instance.has_changed('status', update_fields=update_fields)
+            and hasattr(instance, 'chat_room')):
+        # Notify both parties about the status change in one insert
+        notify_case_status_changed(instance.chat_room)
 
 
 @receiver(post_save, sender=ChatNotification)
 def send_realtime_notification(sender, instance, created, **kwargs):
     """
-    Send real-time notification via WebSocket when a new notification is created
+    Queue a real-time push for a new notification; it goes out after commit
     """
     if created:
-        channel_layer = get_channel_layer()
-        
-        # Send to user's notification channel
-        async_to_sync(channel_layer.group_send)(
-            f"user_{instance.recipient.id}",
-            {
-                'type': 'notification_message',
-                'notification': {
-                    'id': instance.id,
-                    'title': instance.title,
-                    'message': instance.message,
-                    'notification_type': instance.notification_type,
-                    'created_at': instance.created_at.isoformat(),
-                    'case_number': instance.chat_room.case.case_number if instance.chat_room else None,
-                    'sender': {
-                        'id': instance.sender.id,
-                        'phone_number': instance.sender.phone_number
-                    } if instance.sender else None
-                }
-            }
-        )
\ No newline at end of file
+        notification_dispatcher.push(instance.recipient_id, notification_payload(instance))
@@ -1,3 +1,659 @@
-from django.test import TestCase
+import asyncio
+import datetime
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from caseApp.models import Case
+from chatApp.middleware import JWTAuthMiddlewareStack, jwt_user_cache
+from chatApp.models import ChatRoom
+from chatApp.routing import websocket_urlpatterns
+from chatApp.utils import save_chat_message
+from clientApp.models import Client
+from professionalApp.models import Lawyer
+from speciliarizationApp.models import Specialization
+from userApp.models import CustomUser
+
+
+class ChatRoomMixin:
+    """
+    Sets up a chat room between a client and a lawyer
+    """
+
+    def setUp(self):
+        admin = CustomUser.objects.create_user(
+            phone_number='0780000000', role='admin', email='admin@gmail.com', password='Secret#123'
+        )
+        self.client_user = CustomUser.objects.create_user(phone_number='0781000001', role='customer')
+        client = Client.objects.create(
+            user=self.client_user, first_name='Client', last_name='One', gender='male',
+            date_of_birth=datetime.date(1990, 1, 1), marital_status='single',
+            province='Kigali', district='Gasabo', sector='Remera', cell='Rukiri',
+            education_level='bachelor', national_id='C000000000000001'
+        )
+        self.lawyer_user = CustomUser.objects.create_user(phone_number='0782000001', role='lawyer')
+        lawyer = Lawyer.objects.create(
+            user=self.lawyer_user, first_name='Lawyer', last_name='One', gender='female',
+            marital_status='single', residence_district='Gasabo', residence_sector='Remera',
+            education_level='master', national_id_number='L000000000000001', created_by=admin
+        )
+        specialization = Specialization.objects.create(name='Family Law', created_by=admin)
+        case = Case.objects.create(
+            title='Case', description='Description', client=client,
+            lawyer=lawyer, specialization=specialization
+        )
+        self.chat_room = ChatRoom.objects.create(case=case, client=client, lawyer=lawyer)
+
+
+class ChatTestCase(ChatRoomMixin, TestCase):
+    pass
+
+
+class ChatSocketTestCase(ChatRoomMixin, TransactionTestCase):
+    """
+    Base class for websocket tests. Consumers reach the database from other
+    threads, so these run outside a test transaction.
+    """
+
+    def setUp(self):
+        super().setUp()
+        jwt_user_cache.clear()
+        self.application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+        self.tokens = {}
+
+    async def receive_until(self, communicator, frame_type):
+        """Next frame of the given type, skipping others (presence, typing...)"""
+        while True:
+            frame = await communicator.receive_json_from(timeout=2)
+            if frame['type'] == frame_type:
+                return frame
+
+    def connect(self, path, user):
+        """Communicator for path, authenticated with one token per user"""
+        token = self.tokens.setdefault(user.pk, str(AccessToken.for_user(user)))
+        return WebsocketCommunicator(self.application, f"{path}?token={token}")
+
+
+class ChatRoomCounterTests(ChatTestCase):
+    """
+    Storing messages keeps the room's counters and last message current
+    """
+
+    def test_last_message_and_counters_follow_new_messages(self):
+        save_chat_message(self.chat_room, self.client_user, 'Hello')
+        second = save_chat_message(self.chat_room, self.client_user, 'Are you there?')
+
+        room = ChatRoom.objects.get(pk=self.chat_room.pk)
+        self.assertEqual(room.last_message_id, second.id)
+        self.assertEqual(room.last_message_at, second.created_at)
+        self.assertEqual(room.message_count, 2)
+        self.assertEqual(room.lawyer_unread_count, 2)
+        self.assertEqual(room.client_unread_count, 0)
+
+
+class MarkChatRoomReadTests(ChatTestCase):
+    """
+    Marking a room read resets the reader's unread count
+    """
+
+    def test_mark_read_returns_new_unread_count(self):
+        from rest_framework.test import APIClient
+
+        for content in ('One', 'Two', 'Three'):
+            save_chat_message(self.chat_room, self.client_user, content)
+        api = APIClient()
+        api.force_authenticate(self.lawyer_user)
+        self.assertEqual(api.get('/chat/stats/').json()['unread_messages'], 3)
+
+        response = api.post(f'/chat/rooms/{self.chat_room.pk}/mark-read/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['unread_count'], 0)
+        self.assertEqual(api.get('/chat/stats/').json()['unread_messages'], 0)
+
+
+class InboxQueryTests(ChatTestCase):
+    """
+    Listing the inbox must not issue queries per room
+    """
+
+    def add_room(self, n):
+        room = self.chat_room
+        client_user = CustomUser.objects.create_user(phone_number=f'0781{n:06d}', role='customer')
+        client = Client.objects.create(
+            user=client_user, first_name='Client', last_name=str(n), gender='male',
+            date_of_birth=datetime.date(1990, 1, 1), marital_status='single',
+            province='Kigali', district='Gasabo', sector='Remera', cell='Rukiri',
+            education_level='bachelor', national_id=f'C{n:015d}'
+        )
+        case = Case.objects.create(
+            title=f'Case {n}', description='Description', client=client,
+            lawyer=room.lawyer, specialization=room.case.specialization
+        )
+        chat_room = ChatRoom.objects.create(case=case, client=client, lawyer=room.lawyer)
+        save_chat_message(chat_room, client_user, f'Hello {n}')
+
+    def count_inbox_queries(self, api):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as context:
+            response = api.get('/chat/rooms/')
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_inbox_query_count_is_constant(self):
+        from rest_framework.test import APIClient
+
+        api = APIClient()
+        api.force_authenticate(self.lawyer_user)
+        save_chat_message(self.chat_room, self.client_user, 'Hello')
+        single = self.count_inbox_queries(api)
+
+        for n in range(2, 7):
+            self.add_room(n)
+        many = self.count_inbox_queries(api)
+
+        self.assertEqual(single, many)
+        self.assertEqual(many, 3)
+
+
+class MessageListReadTests(ChatTestCase):
+    """
+    Listing messages marks them read in bulk and tells the room after commit
+    """
+
+    def test_listing_marks_read_even_if_the_channel_layer_is_down(self):
+        from unittest import mock
+        from rest_framework.test import APIClient
+        from chatApp.models import Message, MessageReadStatus
+
+        for content in ('One', 'Two'):
+            save_chat_message(self.chat_room, self.client_user, content)
+        api = APIClient()
+        api.force_authenticate(self.lawyer_user)
+
+        layer = mock.Mock()
+        layer.group_send = mock.AsyncMock(side_effect=ConnectionError('Redis is down'))
+        with mock.patch('chatApp.dispatch.get_channel_layer', return_value=layer), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = api.get(f'/chat/rooms/{self.chat_room.pk}/messages/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Message.objects.filter(is_read=True).count(), 2)
+        self.assertEqual(MessageReadStatus.objects.filter(user=self.lawyer_user).count(), 2)
+        group, event = layer.group_send.call_args.args
+        self.assertEqual((group, event['type'], event['read_count']), (f'chat_{self.chat_room.pk}', 'messages_read', 2))
+
+
+class JWTAuthMiddlewareTests(ChatSocketTestCase):
+    """
+    Token connections are authenticated from the cache, without the session stack
+    """
+
+    def test_reconnects_with_a_token_skip_session_and_database(self):
+        from unittest import mock
+        from chatApp import middleware
+
+        async def reconnect(times):
+            results = []
+            for _ in range(times):
+                communicator = self.connect('/ws/notifications/', self.lawyer_user)
+                connected, _ = await communicator.connect()
+                results.append(connected)
+                await communicator.disconnect()
+            return results
+
+        with mock.patch('channels.auth.get_user') as session_get_user, \
+                mock.patch.object(middleware, 'load_user', wraps=middleware.load_user) as load_user:
+            self.assertEqual(async_to_sync(reconnect)(3), [True, True, True])
+        session_get_user.assert_not_called()
+        self.assertEqual(load_user.call_count, 1)
+
+    def test_cancelled_lookup_releases_waiters(self):
+        from unittest import mock
+        from chatApp import middleware
+
+        token = str(AccessToken.for_user(self.lawyer_user))
+
+        async def slow_load_user(user_id):
+            await asyncio.sleep(10)
+
+        async def race():
+            leader = asyncio.ensure_future(middleware.get_user_for_token(token))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(middleware.get_user_for_token(token))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await asyncio.wait_for(waiter, timeout=1)
+
+        with mock.patch.object(middleware, 'load_user', slow_load_user):
+            self.assertIsNone(async_to_sync(race)())
+        self.assertEqual(middleware.jwt_user_cache.in_flight, {})
+
+
+class PresenceTests(ChatSocketTestCase):
+    """
+    Any inbound frame keeps a socket's presence alive, throttled
+    """
+
+    def count_heartbeats(self, refresh_interval, frames):
+        from unittest import mock
+        from chatApp import consumers
+        from chatApp.presence import get_presence
+
+        async def chat():
+            communicator = self.connect(f'/ws/chat/{self.chat_room.pk}/', self.lawyer_user)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await self.receive_until(communicator, 'presence_state')
+            for _ in range(frames):
+                await communicator.send_json_to({'type': 'typing', 'is_typing': True})
+                await self.receive_until(communicator, 'typing_status')
+            await communicator.disconnect()
+
+        presence = get_presence()
+        with mock.patch.object(consumers, 'PRESENCE_REFRESH_INTERVAL', refresh_interval), \
+                mock.patch.object(presence, 'heartbeat', wraps=presence.heartbeat) as heartbeat:
+            async_to_sync(chat)()
+        return heartbeat.call_count
+
+    def test_typing_frames_refresh_presence(self):
+        # One registration on connect plus one refresh per frame
+        self.assertEqual(self.count_heartbeats(0, frames=2), 3)
+
+    def test_refreshes_are_throttled(self):
+        self.assertEqual(self.count_heartbeats(60, frames=3), 1)
+
+
+class SystemMessageTests(ChatSocketTestCase):
+    """
+    System messages are stored, counted and broadcast to the room after commit
+    """
+
+    def test_system_message_reaches_the_room(self):
+        from channels.db import database_sync_to_async
+        from chatApp import utils
+
+        utils._system_user = None
+
+        async def chat():
+            communicator = self.connect(f'/ws/chat/{self.chat_room.pk}/', self.lawyer_user)
+            await communicator.connect()
+            message = await database_sync_to_async(utils.create_system_message)(self.chat_room, 'Case updated')
+            frame = await self.receive_until(communicator, 'chat_message')
+            await communicator.disconnect()
+            return message, frame
+
+        message, frame = async_to_sync(chat)()
+        self.assertEqual(frame['message']['id'], message.id)
+        self.assertEqual(frame['message']['message_type'], 'system')
+        room = ChatRoom.objects.get(pk=self.chat_room.pk)
+        self.assertEqual((room.last_message_id, room.client_unread_count, room.lawyer_unread_count), (message.id, 1, 1))
+
+
+class ReadCursorTests(ChatTestCase):
+    """
+    Reading moves a per-user cursor forward only and flags the read messages
+    """
+
+    def test_cursor_only_moves_forward(self):
+        from chatApp.models import Message
+        from chatApp.utils import mark_messages_read
+
+        first, second, third = [
+            save_chat_message(self.chat_room, self.client_user, content) for content in ('One', 'Two', 'Three')
+        ]
+        self.assertEqual(mark_messages_read(self.chat_room, self.lawyer_user, up_to_message_id=second.id), second.id)
+        self.assertEqual(self.chat_room.unread_count_for(self.lawyer_user), 1)
+        self.assertEqual(
+            list(Message.objects.filter(is_read=True).values_list('id', flat=True).order_by('id')),
+            [first.id, second.id]
+        )
+
+        self.assertEqual(mark_messages_read(self.chat_room, self.lawyer_user, up_to_message_id=first.id), second.id)
+        self.assertEqual(self.chat_room.get_last_read_message_id(self.lawyer_user), second.id)
+
+        self.assertEqual(mark_messages_read(self.chat_room, self.lawyer_user), third.id)
+        self.assertEqual(self.chat_room.unread_count_for(self.lawyer_user), 0)
+
+    def test_unread_count_follows_the_stored_cursor(self):
+        from unittest import mock
+        from chatApp.models import ChatRoomReadCursor
+        from chatApp.utils import mark_messages_read
+
+        first, _, third = [
+            save_chat_message(self.chat_room, self.client_user, content) for content in ('One', 'Two', 'Three')
+        ]
+        advance = ChatRoomReadCursor.advance.__func__
+
+        def advance_then_race(cls, chat_room, user, message_id):
+            moved = advance(cls, chat_room, user, message_id)
+            # Another tab reads further before this reader resets its counter
+            advance(cls, chat_room, user, third.id)
+            return moved
+
+        with mock.patch.object(ChatRoomReadCursor, 'advance', classmethod(advance_then_race)):
+            self.assertEqual(mark_messages_read(self.chat_room, self.lawyer_user, up_to_message_id=first.id), third.id)
+        self.assertEqual(self.chat_room.unread_count_for(self.lawyer_user), 0)
+
+
+class MessageHistoryTests(ChatTestCase):
+    """
+    Chat history pages backwards and forwards from message cursors
+    """
+
+    def test_before_and_after_cursors(self):
+        from rest_framework.test import APIClient
+
+        messages = [save_chat_message(self.chat_room, self.client_user, str(n)) for n in range(5)]
+        ids = [message.id for message in messages]
+        api = APIClient()
+        api.force_authenticate(self.lawyer_user)
+        url = f'/chat/rooms/{self.chat_room.pk}/messages/'
+
+        latest = api.get(url, {'limit': 2}).json()
+        self.assertEqual([message['id'] for message in latest['results']], ids[3:])
+        self.assertTrue(latest['has_more_before'])
+
+        older = api.get(url, {'limit': 2, 'before': latest['before']}).json()
+        self.assertEqual([message['id'] for message in older['results']], ids[1:3])
+        self.assertTrue(older['has_more_after'])
+
+        newer = api.get(url, {'limit': 2, 'after': ids[0]}).json()
+        self.assertEqual([message['id'] for message in newer['results']], ids[1:3])
+
+        self.assertEqual(api.get(url, {'before': 0}).status_code, 400)
+
+
+class NotificationCoalescingTests(ChatTestCase):
+    """
+    New-message notifications are coalesced per room and suppressed for watchers
+    """
+
+    def test_messages_share_one_notification(self):
+        from chatApp.models import ChatNotification
+        from chatApp.utils import notify_new_message
+
+        first = notify_new_message(self.chat_room, self.client_user)
+        second = notify_new_message(self.chat_room, self.client_user, count=2)
+        self.assertEqual(first.pk, second.pk)
+        notification = ChatNotification.objects.get()
+        self.assertEqual(notification.recipient, self.lawyer_user)
+        self.assertEqual(notification.message_count, 3)
+        self.assertEqual(notification.title, f'3 new messages in case {self.chat_room.case.case_number}')
+
+    def test_no_notification_while_watching_the_room(self):
+        from chatApp.models import ChatNotification
+        from chatApp.presence import get_presence
+        from chatApp.utils import notify_new_message
+
+        presence = get_presence()
+        async_to_sync(presence.join)(self.chat_room.pk, self.lawyer_user.pk, 'test-channel')
+        try:
+            self.assertIsNone(notify_new_message(self.chat_room, self.client_user))
+        finally:
+            async_to_sync(presence.leave)(self.chat_room.pk, self.lawyer_user.pk, 'test-channel')
+        self.assertFalse(ChatNotification.objects.exists())
+
+
+class NotificationDispatcherTests(ChatTestCase):
+    """
+    Pushes go out after commit, not on rollback, and batch() sends them together
+    """
+
+    def setUp(self):
+        super().setUp()
+        from unittest import mock
+        from chatApp.dispatch import NotificationDispatcher
+
+        self.dispatcher = NotificationDispatcher(background=False)
+        self.dispatcher.send = mock.Mock()
+
+    def test_pushes_wait_for_commit(self):
+        from django.db import transaction
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dispatcher.push(1, {'id': 1})
+            self.dispatcher.send.assert_not_called()
+        self.dispatcher.send.assert_called_once()
+        (events,), _ = self.dispatcher.send.call_args
+        self.assertEqual(events, [('user_1', {'type': 'notification_message', 'notification': {'id': 1}})])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.dispatcher.push(2, {'id': 2})
+                    raise ValueError
+            except ValueError:
+                pass
+        self.dispatcher.send.assert_called_once()
+
+    def test_batch_sends_once(self):
+        with self.dispatcher.batch():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.dispatcher.push(1, {'id': 1})
+                self.dispatcher.broadcast('chat_1', {'type': 'chat_message'})
+            with self.captureOnCommitCallbacks(execute=True):
+                self.dispatcher.push(2, {'id': 2})
+            self.dispatcher.send.assert_not_called()
+        self.dispatcher.send.assert_called_once()
+        (events,), _ = self.dispatcher.send.call_args
+        self.assertEqual([group for group, _ in events], ['user_1', 'chat_1', 'user_2'])
+
+
+class CaseEventNotificationTests(ChatTestCase):
+    """
+    Each case event notifies both participants with a single insert
+    """
+
+    def notification_inserts(self, save):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from chatApp.models import ChatNotification
+
+        table = ChatNotification._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            save()
+        return [
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT') and table in query['sql']
+        ]
+
+    def test_one_insert_per_case_event(self):
+        from chatApp.models import ChatNotification
+
+        room = self.chat_room
+        case = Case.objects.create(
+            title='Second case', description='Description', client=room.client,
+            specialization=room.case.specialization
+        )
+        case.lawyer = room.lawyer
+        case.status = 'assigned'
+        # Assignment opens the room and changes the status: two events
+        self.assertEqual(len(self.notification_inserts(case.save)), 2)
+
+        case.status = 'in_progress'
+        self.assertEqual(len(self.notification_inserts(case.save)), 1)
+
+        # Every insert wrote the notifications of both participants
+        notifications = ChatNotification.objects.filter(chat_room__case=case)
+        self.assertEqual(notifications.filter(notification_type='case_assigned').count(), 2)
+        self.assertEqual(notifications.filter(notification_type='case_status_changed').count(), 4)
+
+
+class ChatStatsTests(ChatTestCase):
+    """
+    Chat statistics come from a single query
+    """
+
+    def test_stats_in_one_query(self):
+        from chatApp.models import ChatNotification
+        from chatApp.utils import get_user_chat_stats
+
+        for content in ('One', 'Two'):
+            save_chat_message(self.chat_room, self.client_user, content)
+        save_chat_message(self.chat_room, self.lawyer_user, 'Three')
+        ChatRoom.objects.filter(pk=self.chat_room.pk).update(is_active=False)
+        notifications = ChatNotification.objects.filter(recipient=self.lawyer_user, is_read=False).count()
+
+        with self.assertNumQueries(1):
+            stats = get_user_chat_stats(self.lawyer_user)
+        self.assertEqual(stats, {
+            'total_chat_rooms': 1, 'active_chat_rooms': 0, 'total_messages_sent': 1,
+            'unread_messages': 2, 'unread_notifications': notifications,
+        })
+        with self.assertNumQueries(1):
+            stats = get_user_chat_stats(self.lawyer_user, active_only=True)
+        self.assertEqual(
+            (stats['total_chat_rooms'], stats['total_messages_sent'], stats['unread_messages']), (0, 0, 0)
+        )
+
+
+class ChatConsumerTests(ChatSocketTestCase):
+    """
+    Messages sent over the socket are acked, stored, counted and broadcast
+    """
+
+    def test_round_trip(self):
+        from rest_framework.test import APIClient
+        from chatApp.models import Message
+
+        async def chat():
+            client_socket = self.connect(f'/ws/chat/{self.chat_room.pk}/', self.client_user)
+            lawyer_socket = self.connect(f'/ws/chat/{self.chat_room.pk}/', self.lawyer_user)
+            self.assertTrue((await client_socket.connect())[0])
+            self.assertTrue((await lawyer_socket.connect())[0])
+            await client_socket.send_json_to({
+                'type': 'chat_message', 'message': 'Hello', 'client_message_id': 'c1'
+            })
+            ack = await self.receive_until(client_socket, 'message_ack')
+            received = await self.receive_until(lawyer_socket, 'chat_message')
+            await client_socket.disconnect()
+            await lawyer_socket.disconnect()
+            return ack, received
+
+        ack, received = async_to_sync(chat)()
+        self.assertEqual(ack['client_message_id'], 'c1')
+        self.assertTrue(ack['message']['is_own_message'])
+        self.assertEqual(received['message']['id'], ack['message']['id'])
+        self.assertFalse(received['message']['is_own_message'])
+
+        message = Message.objects.get(pk=ack['message']['id'])
+        self.assertEqual((message.content, message.sender), ('Hello', self.client_user))
+        room = ChatRoom.objects.get(pk=self.chat_room.pk)
+        self.assertEqual((room.last_message_id, room.message_count, room.lawyer_unread_count), (message.id, 1, 1))
+
+        api = APIClient()
+        api.force_authenticate(self.lawyer_user)
+        response = api.post(f'/chat/rooms/{self.chat_room.pk}/mark-read/')
+        self.assertEqual(response.json()['last_read_message_id'], message.id)
+        self.assertEqual(response.json()['unread_count'], 0)
+
+    def test_rejects_non_participants(self):
+        outsider = CustomUser.objects.create_user(phone_number='0783000001', role='customer')
+
+        async def chat():
+            communicator = self.connect(f'/ws/chat/{self.chat_room.pk}/', outsider)
+            connected, _ = await communicator.connect()
+            return connected
+
+        self.assertFalse(async_to_sync(chat)())
+
+
+class ChatWriteBufferTests(ChatSocketTestCase):
+    """
+    Buffered socket writes are flushed by size, by timer and on disconnect
+    """
+
+    def add_messages(self, buffer, count):
+        async def add():
+            return await asyncio.gather(*(
+                buffer.add_message(self.chat_room, self.client_user, f'Message {n}') for n in range(count)
+            ))
+        return async_to_sync(add)()
+
+    def test_full_batch_is_written_at_once(self):
+        from unittest import mock
+        from chatApp.writer import ChatWriteBuffer
+
+        buffer = ChatWriteBuffer(flush_interval=60, max_batch=3)
+        with mock.patch.object(buffer, 'write', wraps=buffer.write) as write:
+            messages = self.add_messages(buffer, 3)
+        write.assert_called_once()
+        self.assertEqual(len({message['id'] for message in messages}), 3)
+        room = ChatRoom.objects.get(pk=self.chat_room.pk)
+        self.assertEqual((room.message_count, room.last_message_id), (3, messages[-1]['id']))
+
+    def test_timer_flushes_a_partial_batch(self):
+        from chatApp.writer import ChatWriteBuffer
+
+        messages = self.add_messages(ChatWriteBuffer(flush_interval=0.01, max_batch=100), 2)
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(ChatRoom.objects.get(pk=self.chat_room.pk).message_count, 2)
+
+    def test_row_by_row_fallback_without_bulk_insert_ids(self):
+        from unittest import mock
+        from django.db import connection
+        from chatApp.models import ChatNotification, Message
+        from chatApp.writer import ChatWriteBuffer
+
+        buffer = ChatWriteBuffer(flush_interval=60, max_batch=2)
+        # As on MySQL, which returns no ids from bulk inserts
+        features = mock.patch.object(
+            type(connection.features), 'can_return_rows_from_bulk_insert',
+            new_callable=mock.PropertyMock, return_value=False
+        )
+        with features:
+            messages = self.add_messages(buffer, 2)
+        self.assertEqual(
+            sorted(message['id'] for message in messages),
+            sorted(Message.objects.values_list('id', flat=True))
+        )
+        self.assertEqual(ChatNotification.objects.get().message_count, 2)
+
+    def test_disconnect_flushes_pending_messages(self):
+        from unittest import mock
+        from chatApp.models import Message
+        from chatApp.writer import chat_write_buffer
+
+        async def chat():
+            communicator = self.connect(f'/ws/chat/{self.chat_room.pk}/', self.client_user)
+            await communicator.connect()
+            await communicator.send_json_to({'type': 'chat_message', 'message': 'Bye'})
+            await self.receive_until(communicator, 'presence_state')
+            await communicator.disconnect()
+
+        with mock.patch.object(chat_write_buffer, 'flush_interval', 60):
+            async_to_sync(chat)()
+        self.assertEqual(list(Message.objects.values_list('content', flat=True)), ['Bye'])
+
+
+class NotificationBacklogTests(ChatSocketTestCase):
+    """
+    Notification sockets resume from the last notification id they saw
+    """
+
+    def test_backlog_on_connect_and_resume(self):
+        from chatApp.utils import notify_chat_room_created, notify_case_status_changed
+
+        seen, = notify_chat_room_created(self.chat_room)[1:]
+        missed, = notify_case_status_changed(self.chat_room)[1:]
+
+        async def resume():
+            communicator = self.connect('/ws/notifications/', self.lawyer_user)
+            communicator.scope['query_string'] += f'&last_notification_id={seen.id}'.encode()
+            await communicator.connect()
+            on_connect = await self.receive_until(communicator, 'notification_backlog')
+            await communicator.send_json_to({'type': 'resume', 'last_notification_id': 0})
+            on_resume = await self.receive_until(communicator, 'notification_backlog')
+            await communicator.disconnect()
+            return on_connect, on_resume
+
+        on_connect, on_resume = async_to_sync(resume)()
+        self.assertEqual([n['id'] for n in on_connect['notifications']], [missed.id])
+        self.assertEqual(on_connect['last_notification_id'], missed.id)
+        self.assertFalse(on_connect['has_more'])
+        self.assertEqual([n['id'] for n in on_resume['notifications']], [seen.id, missed.id])
+        self.assertEqual(on_resume['unread_count'], 2)
@@ -1,144 +1,393 @@
 # chatApp/utils.py
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from django.utils.timezone import now
+from django.db import connection, transaction
+from django.db.models import Func, IntegerField, Q, Subquery
+from django.db.models.functions import Coalesce
+from datetime import timedelta
 
-from .models import ChatNotification
+from .dispatch import notification_dispatcher
+from .models import ChatNotification, ChatRoomQuerySet, count_subquery
+from emailApp.services import queue_email
 from userApp.models import CustomUser
 
 
+NOTIFICATION_COALESCE_WINDOW = getattr(settings, 'CHAT_NOTIFICATION_COALESCE_WINDOW', 300)  # seconds
+SYSTEM_USER_PHONE = 'system'
+
+_system_user = None
+
+
 def send_notification_to_user(user_id, notification_data):
     """
-    Send real-time notification to a specific user via WebSocket
+    Send real-time notification to a specific user via WebSocket, once the
+    current transaction commits (see NotificationDispatcher)
     """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f"user_{user_id}",
-        {
-            'type': 'notification_message',
-            'notification': notification_data
-        }
-    )
+    notification_dispatcher.push(user_id, notification_data)
 
 
 def send_email_notification(recipient_email, subject, template_name, context):
     """
-    Send email notification
+    Queue email notification for background delivery
     """
     try:
         html_message = render_to_string(template_name, context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             subject=subject,
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[recipient_email],
             html_message=html_message,
-            fail_silently=False,
         )
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        print(f"Error queueing email: {e}")
         return False
 
 
-def create_system_message(chat_room, content):
+def save_chat_message(chat_room, sender, content, message_type='text', attachment=None):
     """
-    Create a system message in a chat room
+    Store a new chat message and bump the room's updated_at.
+    Shared by the REST endpoint and the websocket consumer.
     """
     from .models import Message
     
-    # Get or create a system user (you might want to create a dedicated system user)
+    with transaction.atomic():
+        message = Message.objects.create(
+            chat_room=chat_room,
+            sender=sender,
+            content=content,
+            message_type=message_type,
+            attachment=attachment
+        )
+        
+        # Update the room's counters, last message and updated_at
+        chat_room.record_messages([message])
+    
+    return message
+
+
+def new_message_text(chat_room, sender, count):
+    """Title and body of a new_message notification covering count messages"""
+    if count == 1:
+        return (
+            f'New message in case {chat_room.case.case_number}',
+            f'{sender.phone_number} sent you a message'
+        )
+    return (
+        f'{count} new messages in case {chat_room.case.case_number}',
+        f'{sender.phone_number} sent you {count} messages'
+    )
+
+
+def notify_new_message(chat_room, sender, count=1):
+    """
+    Notify the other participant of the room about count new messages.
+    
+    Nothing is stored or pushed while the recipient has the room open on a
+    websocket. Otherwise messages are coalesced into the recipient's unread
+    new_message notification for the room if it is less than
+    NOTIFICATION_COALESCE_WINDOW seconds old, so the table grows by at most
+    one row per room per window. Returns the notification, or None.
+    """
+    if sender.id == chat_room.client.user_id:
+        recipient = chat_room.lawyer.user
+    else:
+        recipient = chat_room.client.user
+    
+    if is_watching_room(chat_room, recipient):
+        return None
+    
+    window_start = now() - timedelta(seconds=NOTIFICATION_COALESCE_WINDOW)
+    with transaction.atomic():
+        notification = ChatNotification.objects.select_for_update().filter(
+            recipient=recipient,
+            sender=sender,
+            chat_room=chat_room,
+            notification_type='new_message',
+            is_read=False,
+            created_at__gte=window_start
+        ).order_by('-created_at').first()
+        
+        if notification is None:
+            title, message = new_message_text(chat_room, sender, count)
+            return ChatNotification.objects.create(
+                recipient=recipient,
+                sender=sender,
+                chat_room=chat_room,
+                notification_type='new_message',
+                title=title,
+                message=message,
+                message_count=count
+            )
+        
+        notification.message_count += count
+        notification.title, notification.message = new_message_text(chat_room, sender, notification.message_count)
+        notification.save(update_fields=['message_count', 'title', 'message'])
+    
+    # post_save only pushes new rows, so push the updated count here
+    notification.chat_room = chat_room
+    notification.sender = sender
+    send_notification_to_user(recipient.id, notification_payload(notification))
+    return notification
+
+
+def is_watching_room(chat_room, user):
+    """Whether the user has the room open on a websocket right now"""
+    from .presence import get_presence
+    
     try:
-        system_user = CustomUser.objects.get(phone_number='system')
-    except CustomUser.DoesNotExist:
-        # Create system user if it doesn't exist
-        system_user = CustomUser.objects.create_user(
-            phone_number='system',
-            role='admin',
-            email='system@example.com'
+        return get_presence().is_online(chat_room.id, user.id)
+    except Exception as e:
+        print(f"Error reading presence: {e}")
+        return False
+
+
+def notification_payload(notification):
+    """
+    Realtime payload for a notification, built from already-loaded objects
+    """
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'message_count': notification.message_count,
+        'created_at': notification.created_at.isoformat(),
+        'case_number': notification.chat_room.case.case_number if notification.chat_room else None,
+        'sender': {
+            'id': notification.sender.id,
+            'phone_number': notification.sender.phone_number
+        } if notification.sender else None
+    }
+
+
+def create_notifications(chat_room, notification_type, entries, sender=None):
+    """
+    Create one notification per (recipient, title, message) entry with a
+    single bulk_create and queue their realtime pushes as one batch
+    (bulk_create skips post_save, so the pushes are queued here).
+    chat_room.case and sender should already be loaded.
+    """
+    created_at = now()
+    notifications = [
+        ChatNotification(
+            recipient=recipient,
+            sender=sender,
+            chat_room=chat_room,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            created_at=created_at
         )
+        for recipient, title, message in entries
+    ]
+    ChatNotification.objects.bulk_create(notifications)
     
-    message = Message.objects.create(
-        chat_room=chat_room,
-        sender=system_user,
-        content=content,
-        message_type='system'
+    if not connection.features.can_return_rows_from_bulk_insert:
+        # No ids back from the insert (MySQL), read them in one query
+        ids = dict(
+            ChatNotification.objects.filter(
+                chat_room=chat_room,
+                notification_type=notification_type,
+                created_at=created_at
+            ).values_list('recipient_id', 'id')
+        )
+        for notification in notifications:
+            notification.id = ids.get(notification.recipient_id)
+    
+    notification_dispatcher.push_many(
+        (notification.recipient_id, notification_payload(notification))
+        for notification in notifications
     )
+    return notifications
+
+
+def notify_chat_room_created(chat_room):
+    """Tell both participants that the chat room for their case is open"""
+    title = f'Chat room created for case {chat_room.case.case_number}'
+    return create_notifications(chat_room, 'case_assigned', [
+        (chat_room.client.user, title, 'You can now chat with your assigned lawyer'),
+        (chat_room.lawyer.user, title, 'You can now chat with your client'),
+    ])
+
+
+def notify_case_status_changed(chat_room):
+    """Tell the case's client and lawyer about its new status"""
+    case = chat_room.case
+    status_display = case.get_status_display()
+    title = f'Case {case.case_number} status updated'
+    entries = [(case.client.user, title, f'Your case status has been changed to: {status_display}')]
+    if case.lawyer:
+        entries.append((case.lawyer.user, title, f'Case status has been changed to: {status_display}'))
+    return create_notifications(chat_room, 'case_status_changed', entries)
+
+
+def mark_messages_read(chat_room, user, up_to_message_id=None):
+    """
+    Move the user's read cursor in the room forward, up to up_to_message_id or
+    the newest message, and tell the room how far the user has read. The
+    cursor, the unread counter, the per-message is_read flags and the
+    MessageReadStatus rows change in one transaction. Returns the user's
+    last read message id.
+    """
+    from .models import ChatRoom, ChatRoomReadCursor, Message, MessageReadStatus
     
-    # Send real-time update
-    from .serializers import MessageSerializer
-    channel_layer = get_channel_layer()
+    incoming = chat_room.messages.filter(is_deleted=False).exclude(sender=user)
+    if up_to_message_id is None:
+        up_to_message_id = incoming.order_by('-id').values_list('id', flat=True).first()
+        if up_to_message_id is None:
+            return chat_room.get_last_read_message_id(user)
     
-    # Create mock request for serializer
-    class MockRequest:
-        def __init__(self):
-            self.user = system_user
+    with transaction.atomic():
+        if not ChatRoomReadCursor.advance(chat_room, user, up_to_message_id):
+            return chat_room.get_last_read_message_id(user)
+        
+        # Count what is left past the cursor as stored, locked, so a
+        # concurrent read that moved it further is not undone
+        last_read_message_id = ChatRoomReadCursor.objects.select_for_update().filter(
+            chat_room=chat_room, user=user
+        ).values_list('last_read_message_id', flat=True).get()
+        unread_field = chat_room.unread_field_for(user)
+        ChatRoom.objects.filter(pk=chat_room.pk).update(**{
+            unread_field: count_subquery(incoming.filter(id__gt=last_read_message_id))
+        })
+        
+        message_ids = list(
+            incoming.filter(is_read=False, id__lte=up_to_message_id).values_list('id', flat=True)
+        )
+        read_at = now()
+        if message_ids:
+            Message.objects.filter(id__in=message_ids).update(is_read=True, read_at=read_at)
+            MessageReadStatus.objects.bulk_create(
+                [MessageReadStatus(message_id=message_id, user=user, read_at=read_at) for message_id in message_ids],
+                batch_size=500,
+                ignore_conflicts=True
+            )
     
-    serializer = MessageSerializer(message, context={'request': MockRequest()})
+    # Reload the counter so chat_room.unread_count_for() reflects the read
+    chat_room.refresh_from_db(fields=[unread_field])
     
-    async_to_sync(channel_layer.group_send)(
+    # Tell the room once committed, off the request thread (see NotificationDispatcher)
+    notification_dispatcher.broadcast(
+        f"chat_{chat_room.id}",
+        {
+            'type': 'messages_read',
+            'user_id': user.id,
+            'last_read_message_id': last_read_message_id,
+            'read_count': len(message_ids),
+            'read_at': read_at.isoformat()
+        }
+    )
+    
+    return last_read_message_id
+
+
+def get_system_user():
+    """
+    The sender of system messages, looked up once per process. The user is
+    created by migration 0005_system_user; get_or_create only covers
+    databases where it has been removed since.
+    """
+    global _system_user
+    if _system_user is None:
+        _system_user, _ = CustomUser.objects.get_or_create(
+            phone_number=SYSTEM_USER_PHONE,
+            defaults={'role': 'admin', 'email': 'system@example.com', 'is_active': False}
+        )
+    return _system_user
+
+
+def system_message_payload(message):
+    """
+    MessageSerializer-shaped data for a system message, built without the
+    serializer since the sender and flags are always the same
+    """
+    sender = message.sender
+    return {
+        'id': message.id,
+        'sender': {
+            'id': sender.id,
+            'phone_number': sender.phone_number,
+            'email': sender.email,
+            'role': sender.role,
+            'full_name': sender.phone_number
+        },
+        'message_type': 'system',
+        'content': message.content,
+        'attachment': None,
+        'is_read': False,
+        'created_at': message.created_at.isoformat(),
+        'updated_at': message.updated_at.isoformat(),
+        'is_own_message': False,
+        'formatted_time': message.created_at.strftime('%H:%M')
+    }
+
+
+def create_system_message(chat_room, content):
+    """
+    Create a system message in a chat room and broadcast it once committed
+    """
+    from .models import Message
+    
+    with transaction.atomic():
+        message = Message.objects.create(
+            chat_room=chat_room,
+            sender=get_system_user(),
+            content=content,
+            message_type='system'
+        )
+        chat_room.record_messages([message])
+    
+    # Send real-time update
+    notification_dispatcher.broadcast(
         f"chat_{chat_room.id}",
         {
             'type': 'chat_message',
-            'message': serializer.data
+            'message': system_message_payload(message)
         }
     )
     
     return message
 
 
-def get_user_chat_stats(user):
+def get_user_chat_stats(user, active_only=False):
     """
-    Get chat statistics for a user
+    Get chat statistics for a user, all in one query. With active_only the
+    room and message figures only cover active chat rooms.
     """
     from .models import ChatRoom, Message
-    from clientApp.models import Client
-    from professionalApp.models import Lawyer
-    
-    stats = {
-        'total_chat_rooms': 0,
-        'active_chat_rooms': 0,
-        'total_messages_sent': 0,
-        'unread_messages': 0,
-        'unread_notifications': 0
-    }
     
-    try:
-        if user.role == 'customer':
-            client = Client.objects.get(user=user)
-            chat_rooms = ChatRoom.objects.filter(client=client)
-        elif user.role == 'lawyer':
-            lawyer = Lawyer.objects.get(user=user)
-            chat_rooms = ChatRoom.objects.filter(lawyer=lawyer)
-        else:
-            return stats
-        
-        stats['total_chat_rooms'] = chat_rooms.count()
-        stats['active_chat_rooms'] = chat_rooms.filter(is_active=True).count()
-        stats['total_messages_sent'] = Message.objects.filter(
-            chat_room__in=chat_rooms,
-            sender=user,
-            is_deleted=False
-        ).count()
-        stats['unread_messages'] = Message.objects.filter(
-            chat_room__in=chat_rooms,
-            is_deleted=False,
-            is_read=False
-        ).exclude(sender=user).count()
-        stats['unread_notifications'] = ChatNotification.objects.filter(
-            recipient=user,
-            is_read=False
-        ).count()
-        
-    except Exception as e:
-        print(f"Error getting chat stats: {e}")
+    chat_rooms = ChatRoom.objects.filter(Q(client__user=user) | Q(lawyer__user=user))
+    if active_only:
+        chat_rooms = chat_rooms.filter(is_active=True)
     
-    return stats
+    messages = Message.objects.filter(chat_room__in=chat_rooms.values('pk'), is_deleted=False)
+    unread = Coalesce(
+        Subquery(
+            chat_rooms.order_by().annotate(
+                total=Func(ChatRoomQuerySet.unread_counter(user), function='SUM', output_field=IntegerField())
+            ).values('total')[:1]
+        ),
+        0
+    )
+    
+    return CustomUser.objects.filter(pk=user.pk).annotate(
+        total_chat_rooms=count_subquery(chat_rooms),
+        active_chat_rooms=count_subquery(chat_rooms.filter(is_active=True)),
+        total_messages_sent=count_subquery(messages.filter(sender=user)),
+        unread_messages=unread,
+        unread_notifications=count_subquery(
+            ChatNotification.objects.filter(recipient=user, is_read=False)
+        )
+    ).values(
+        'total_chat_rooms', 'active_chat_rooms', 'total_messages_sent',
+        'unread_messages', 'unread_notifications'
+    ).get()
 
 
 def validate_file_upload(file):
@@ -171,9 +420,12 @@ def format_chat_room_name(case):
 
 def get_online_users(chat_room_id):
     """
-    Get list of online users in a chat room
-    This would require implementing user presence tracking
+    Get list of ids of users with a live websocket in a chat room
     """
-    # This is a placeholder - you'd need to implement Redis-based presence tracking
-    # or use Django Channels' group management features
-    return []
\ No newline at end of file
+    from .presence import get_presence
+    
+    try:
+        return get_presence().online_users(chat_room_id)
+    except Exception as e:
+        print(f"Error reading presence: {e}")
+        return []
\ No newline at end of file
@@ -11,6 +11,9 @@ from asgiref.sync import async_to_sync
 
 
 from .models import ChatRoom, Message, ChatNotification
+from .utils import mark_messages_read, notify_new_message, notify_chat_room_created, get_user_chat_stats
+from .permissions import IsChatRoomParticipant
+from .pagination import MessageCursorPagination
 from .serializers import (
     ChatRoomSerializer, MessageSerializer, MessageCreateSerializer,
     ChatNotificationSerializer
@@ -32,11 +35,11 @@ class ChatRoomListView(generics.ListAPIView):
         if user.role == 'customer':
             # Get chat rooms where user is the client
             client = get_object_or_404(Client, user=user)
-            return ChatRoom.objects.filter(client=client, is_active=True)
+            return ChatRoom.objects.filter(client=client, is_active=True).for_inbox(user)
         elif user.role == 'lawyer':
             # Get chat rooms where user is the lawyer
             lawyer = get_object_or_404(Lawyer, user=user)
-            return ChatRoom.objects.filter(lawyer=lawyer, is_active=True)
+            return ChatRoom.objects.filter(lawyer=lawyer, is_active=True).for_inbox(user)
         else:
             return ChatRoom.objects.none()
 
@@ -51,18 +54,19 @@ class ChatRoomDetailView(generics.RetrieveAPIView):
         
         if user.role == 'customer':
             client = get_object_or_404(Client, user=user)
-            return ChatRoom.objects.filter(client=client, is_active=True)
+            return ChatRoom.objects.filter(client=client, is_active=True).for_inbox(user)
         elif user.role == 'lawyer':
             lawyer = get_object_or_404(Lawyer, user=user)
-            return ChatRoom.objects.filter(lawyer=lawyer, is_active=True)
+            return ChatRoom.objects.filter(lawyer=lawyer, is_active=True).for_inbox(user)
         else:
             return ChatRoom.objects.none()
 
 
 class MessageListView(generics.ListAPIView):
-    """List messages in a chat room"""
+    """List messages in a chat room, a page at a time (see MessageCursorPagination)"""
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageCursorPagination
     
     def get_queryset(self):
         chat_room_id = self.kwargs.get('chat_room_id')
@@ -81,16 +85,14 @@ class MessageListView(generics.ListAPIView):
         else:
             return Message.objects.none()
         
-        # Mark messages as read for the current user
-        unread_messages = chat_room.messages.filter(
-            is_deleted=False,
-            is_read=False
-        ).exclude(sender=user)
+        # Mark messages as read for the current user, unless only scrolling back
+        if 'before' not in self.request.query_params:
+            mark_messages_read(chat_room, user)
         
-        for message in unread_messages:
-            message.mark_as_read()
-        
-        return chat_room.messages.filter(is_deleted=False)
+        return chat_room.messages.filter(is_deleted=False).select_related(
+            'sender__client',
+            'sender__lawyer'
+        )
 
 
 class MessageCreateView(generics.CreateAPIView):
@@ -126,26 +128,22 @@ class MessageCreateView(generics.CreateAPIView):
             f"chat_{chat_room.id}",
             {
                 'type': 'chat_message',
-                'message': MessageSerializer(message, context={'request': self.request}).data
+                'message': MessageSerializer(message, context={'request': self.request}).data,
+                'sender_id': user.id
             }
         )
         
         # Create notification for the recipient
-        recipient = chat_room.lawyer.user if user.role == 'customer' else chat_room.client.user
-        ChatNotification.objects.create(
-            recipient=recipient,
-            sender=user,
-            chat_room=chat_room,
-            notification_type='new_message',
-            title=f'New message in case {chat_room.case.case_number}',
-            message=f'{user.phone_number} sent you a message'
-        )
+        notify_new_message(chat_room, user)
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def create_chat_room(request, case_id):
     """Create a chat room for a case (only for admins or when case is assigned)"""
-    case = get_object_or_404(Case, id=case_id)
+    case = get_object_or_404(
+        Case.objects.select_related('client__user', 'lawyer__user'),
+        id=case_id
+    )
     
     # Check if chat room already exists
     if hasattr(case, 'chat_room'):
@@ -168,22 +166,8 @@ def create_chat_room(request, case_id):
         lawyer=case.lawyer
     )
     
-    # Create notifications for both parties
-    ChatNotification.objects.create(
-        recipient=case.client.user,
-        chat_room=chat_room,
-        notification_type='case_assigned',
-        title=f'Chat room created for case {case.case_number}',
-        message=f'You can now chat with your assigned lawyer'
-    )
-    
-    ChatNotification.objects.create(
-        recipient=case.lawyer.user,
-        chat_room=chat_room,
-        notification_type='case_assigned',
-        title=f'Chat room created for case {case.case_number}',
-        message=f'You can now chat with your client'
-    )
+    # Notify both parties in one insert
+    notify_chat_room_created(chat_room)
     
     serializer = ChatRoomSerializer(chat_room, context={'request': request})
     return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -231,34 +215,13 @@ def mark_all_notifications_read(request):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def chat_stats(request):
-    """Get chat statistics for the authenticated user"""
-    user = request.user
-    
-    if user.role == 'customer':
-        client = get_object_or_404(Client, user=user)
-        chat_rooms = ChatRoom.objects.filter(client=client, is_active=True)
-    elif user.role == 'lawyer':
-        lawyer = get_object_or_404(Lawyer, user=user)
-        chat_rooms = ChatRoom.objects.filter(lawyer=lawyer, is_active=True)
-    else:
-        chat_rooms = ChatRoom.objects.none()
-    
-    total_chats = chat_rooms.count()
-    unread_messages = Message.objects.filter(
-        chat_room__in=chat_rooms,
-        is_deleted=False,
-        is_read=False
-    ).exclude(sender=user).count()
-    
-    unread_notifications = ChatNotification.objects.filter(
-        recipient=user,
-        is_read=False
-    ).count()
+    """Get chat statistics (badge counts) for the authenticated user in one query"""
+    stats = get_user_chat_stats(request.user, active_only=True)
     
     return Response({
-        'total_chat_rooms': total_chats,
-        'unread_messages': unread_messages,
-        'unread_notifications': unread_notifications
+        'total_chat_rooms': stats['total_chat_rooms'],
+        'unread_messages': stats['unread_messages'],
+        'unread_notifications': stats['unread_notifications']
     })
     
     
@@ -303,15 +266,54 @@ from .models import ChatRoom, Message
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_chat_room_read(request, chat_room_id):
+    """
+    Move the user's read cursor in a chat room forward, to the given
+    message_id or to the newest message
+    """
     chat_room = get_object_or_404(ChatRoom, id=chat_room_id)
-    # Mark all messages as read logic here
-    return Response({'status': 'success'})
+    
+    if not IsChatRoomParticipant().is_participant(request.user, chat_room):
+        return Response(
+            {'error': 'Access denied'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    message_id = request.data.get('message_id')
+    if message_id is not None:
+        try:
+            message_id = int(message_id)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'message_id must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not chat_room.messages.filter(id=message_id).exists():
+            return Response(
+                {'error': 'Message not found in this chat room'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
+    last_read_message_id = mark_messages_read(chat_room, request.user, up_to_message_id=message_id)
+    
+    return Response({
+        'status': 'success',
+        'last_read_message_id': last_read_message_id,
+        'unread_count': chat_room.unread_count_for(request.user)
+    })
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_message_read(request, message_id):
-    message = get_object_or_404(Message, id=message_id)
-    message.mark_as_read()
+    message = get_object_or_404(Message.objects.select_related('chat_room'), id=message_id)
+    
+    if not IsChatRoomParticipant().is_participant(request.user, message.chat_room):
+        return Response(
+            {'error': 'Access denied'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    # Reading a message also reads everything before it
+    mark_messages_read(message.chat_room, request.user, up_to_message_id=message.id)
     return Response({'status': 'success'})
 
 
@@ -0,0 +1,112 @@
+# chatApp/writer.py
+import asyncio
+
+from channels.db import database_sync_to_async
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from .dispatch import notification_dispatcher
+from .models import Message
+from .serializers import MessageSerializer
+
+
+class ChatWriteBuffer:
+    """
+    Process-wide write buffer for messages sent over chat websockets.
+
+    Consumers hand messages to add_message() and await the saved, serialized
+    message. Pending messages are written together: the inserts, one
+    ChatRoom counter update per room and one new_message notification per
+    room and sender all happen in a single thread hop and transaction, and
+    the notification pushes go out as one batch. A batch is flushed once it
+    holds max_batch messages or flush_interval seconds after its first
+    message, whichever comes first, so no message waits longer than
+    flush_interval plus the write itself.
+    """
+
+    def __init__(self, flush_interval=0.05, max_batch=100):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending = []
+        self._timer = None
+
+    async def add_message(self, chat_room, sender, content, message_type='text'):
+        """Queue a message and wait until it is stored; returns its serialized data"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        message = Message(
+            chat_room=chat_room,
+            sender=sender,
+            content=content,
+            message_type=message_type,
+            created_at=now()
+        )
+        self._pending.append((message, future))
+
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(
+                self.flush_interval,
+                lambda: asyncio.ensure_future(self.flush())
+            )
+
+        return await future
+
+    async def flush(self):
+        """Write everything pending now (also called when a socket disconnects)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            serialized = await database_sync_to_async(self.write)(
+                [message for message, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), data in zip(batch, serialized):
+            if not future.done():
+                future.set_result(data)
+
+    def write(self, messages):
+        """Store one batch; runs in the database thread pool"""
+        from .utils import notify_new_message
+
+        rooms = {}
+        senders = {}
+        for message in messages:
+            rooms.setdefault(message.chat_room_id, (message.chat_room, []))[1].append(message)
+            key = (message.chat_room_id, message.sender_id)
+            chat_room, sender, count = senders.get(key, (message.chat_room, message.sender, 0))
+            senders[key] = (chat_room, sender, count + 1)
+
+        with notification_dispatcher.batch(), transaction.atomic():
+            # bulk_create only sets primary keys on backends that can return
+            # them (PostgreSQL, SQLite, MariaDB); elsewhere rows are saved one
+            # by one, still inside one transaction.
+            if connection.features.can_return_rows_from_bulk_insert:
+                Message.objects.bulk_create(messages)
+            else:
+                for message in messages:
+                    message.save()
+            # One counter/last-message UPDATE per room
+            for chat_room, room_messages in rooms.values():
+                chat_room.record_messages(room_messages)
+
+            # One (coalesced) notification per room and sender for the batch
+            for chat_room, sender, count in senders.values():
+                notify_new_message(chat_room, sender, count=count)
+
+        return [MessageSerializer(message).data for message in messages]
+
+
+chat_write_buffer = ChatWriteBuffer()
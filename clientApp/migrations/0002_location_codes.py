@@ -0,0 +1,63 @@
+# Generated by Django 4.2.17 on 2026-10-17 02:57
+
+from django.db import migrations, models
+
+from userApp.locations import normalize_location
+
+
+LOCATION_CODE_FIELDS = [
+    ('province', 'province_code'),
+    ('district', 'district_code'),
+    ('sector', 'sector_code'),
+    ('cell', 'cell_code'),
+]
+
+
+def fill_location_codes(apps, schema_editor):
+    """Compute the location codes of existing rows"""
+    Client = apps.get_model('clientApp', 'Client')
+
+    rows = list(Client.objects.only('id', *(name_field for name_field, _ in LOCATION_CODE_FIELDS)))
+    for row in rows:
+        for name_field, code_field in LOCATION_CODE_FIELDS:
+            setattr(row, code_field, normalize_location(getattr(row, name_field)))
+    Client.objects.bulk_update(rows, [code_field for _, code_field in LOCATION_CODE_FIELDS], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='cell_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='district_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='province_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='sector_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['province_code', 'district_code'], name='client_province_district_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['district_code', 'sector_code', 'cell_code'], name='client_district_sector_idx'),
+        ),
+        migrations.RunPython(fill_location_codes, migrations.RunPython.noop),
+    ]
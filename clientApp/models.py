@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.timezone import now
 from userApp.models import CustomUser
+from userApp.locations import set_location_codes
 
 class Client(models.Model):
     """
@@ -59,6 +60,19 @@ class Client(models.Model):
     cell = models.CharField(max_length=100)
     village = models.CharField(max_length=100, blank=True, null=True)
     
+    # Normalized, indexed forms of the location (see userApp.locations)
+    province_code = models.CharField(max_length=100, blank=True, default='', editable=False)
+    district_code = models.CharField(max_length=100, blank=True, default='', editable=False)
+    sector_code = models.CharField(max_length=100, blank=True, default='', editable=False)
+    cell_code = models.CharField(max_length=100, blank=True, default='', editable=False)
+    
+    LOCATION_CODE_FIELDS = {
+        'province': 'province_code',
+        'district': 'district_code',
+        'sector': 'sector_code',
+        'cell': 'cell_code',
+    }
+    
     # Additional information
     education_level = models.CharField(max_length=20, choices=EDUCATION_LEVEL_CHOICES)
 
@@ -82,9 +96,14 @@ class Client(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Client'
         verbose_name_plural = 'Clients'
+        indexes = [
+            models.Index(fields=['province_code', 'district_code'], name='client_province_district_idx'),
+            models.Index(fields=['district_code', 'sector_code', 'cell_code'], name='client_district_sector_idx'),
+        ]
         
     def save(self, *args, **kwargs):
         # Ensure the linked user has the correct role
         if self.user.role != 'customer':
             raise ValueError("The linked user must have the 'customer' role")
+        kwargs['update_fields'] = set_location_codes(self, self.LOCATION_CODE_FIELDS, kwargs.get('update_fields'))
         super().save(*args, **kwargs)
\ No newline at end of file
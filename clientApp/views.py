@@ -14,11 +14,10 @@ from userApp.views import register_user
 from userApp.serializers import UserSerializer
 import random
 import string
-from django.core.mail import send_mail
+from emailApp.services import queue_email
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.core.mail import send_mail
 from django.db.utils import IntegrityError
 from .models import CustomUser
 from django.contrib.auth.hashers import make_password
@@ -148,7 +147,7 @@ def create_client(request):
                     elif user.role == 'professional':
                         message += "\nYour account was created by a legal professional."
                     
-                    send_mail(
+                    queue_email(
                         subject="Your Account Password",
                         message=message,
                         from_email="no-reply@gmail.com",
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from emailApp.services import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound emails in batches over a reused SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails sent per SMTP connection')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the due emails once and exit')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            sent, failed = send_queued_emails(batch_size=batch_size)
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} email(s), {failed} failed")
+
+            # Keep draining while full batches come back
+            if sent + failed >= batch_size:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
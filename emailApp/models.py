@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils.timezone import now
+
+
+class QueuedEmail(models.Model):
+    """
+    Outbound email waiting to be delivered by the send_queued_emails worker
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),  # Waiting for (another) delivery attempt
+        ('sent', 'Sent'),  # Delivered to the mail server
+        ('failed', 'Failed'),  # Gave up after too many attempts
+    ]
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    html_message = models.TextField(blank=True, null=True)
+    from_email = models.CharField(max_length=255)
+    recipient_list = models.JSONField(default=list)
+
+    # Delivery tracking
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    next_attempt_at = models.DateTimeField(default=now)
+
+    # Timestamps
+    created_at = models.DateTimeField(default=now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        verbose_name = 'Queued Email'
+        verbose_name_plural = 'Queued Emails'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='queued_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipient_list)} ({self.status})"
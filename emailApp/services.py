@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import QueuedEmail
+
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 60  # seconds, doubled after every failed attempt
+CLAIM_TIMEOUT = 600  # seconds a claimed email is reserved for the worker sending it
+
+
+def queue_email(subject, message, recipient_list, from_email=None, html_message=None):
+    """
+    Queue an email for background delivery. Takes the same arguments as
+    django.core.mail.send_mail, but only writes a row, so it is safe to call
+    inside a request or a transaction without waiting on the mail server.
+    """
+    recipients = [recipient for recipient in recipient_list if recipient]
+    if not recipients:
+        return None
+
+    return QueuedEmail.objects.create(
+        subject=subject,
+        message=message,
+        html_message=html_message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient_list=recipients,
+    )
+
+
+def build_message(email, connection):
+    """Build the EmailMultiAlternatives for a queued email"""
+    mail = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.message,
+        from_email=email.from_email,
+        to=email.recipient_list,
+        connection=connection,
+    )
+    if email.html_message:
+        mail.attach_alternative(email.html_message, 'text/html')
+    return mail
+
+
+def retry_delay(attempts):
+    """Exponential backoff before the next delivery attempt"""
+    return timedelta(seconds=RETRY_BASE_DELAY * (2 ** (attempts - 1)))
+
+
+def claim_due_emails(batch_size):
+    """
+    Reserve a batch of due emails for this worker in a short transaction.
+    Claimed rows are pushed CLAIM_TIMEOUT into the future, which hides them
+    from other workers and retries them if this one dies before recording
+    the outcome. The attempt is counted at claim time.
+    """
+    with transaction.atomic():
+        batch = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True).filter(
+                status='pending',
+                next_attempt_at__lte=now()
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            lease = now() + timedelta(seconds=CLAIM_TIMEOUT)
+            QueuedEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=lease
+            )
+            for email in batch:
+                email.attempts += 1
+                email.next_attempt_at = lease
+    return batch
+
+
+def send_queued_emails(batch_size=50):
+    """
+    Deliver one batch of due emails over a single SMTP connection.
+    The batch is claimed first (see claim_due_emails), so several workers can
+    run side by side and no database lock is held while talking to the mail
+    server. Each outcome is recorded as soon as the email is handled, so a
+    worker dying mid-batch re-sends at most the email it was sending.
+    Returns a (sent, failed) tuple for the batch.
+    """
+    sent = failed = 0
+
+    batch = claim_due_emails(batch_size)
+    if not batch:
+        return sent, failed
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Mail server unreachable; release the batch without counting the attempt
+        QueuedEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            attempts=F('attempts') - 1,
+            last_error=str(e),
+            next_attempt_at=now() + timedelta(seconds=RETRY_BASE_DELAY)
+        )
+        return sent, failed
+
+    try:
+        for email in batch:
+            try:
+                build_message(email, connection).send()
+            except Exception as e:
+                email.last_error = str(e)
+                if email.attempts >= MAX_ATTEMPTS:
+                    email.status = 'failed'
+                else:
+                    email.next_attempt_at = now() + retry_delay(email.attempts)
+                failed += 1
+            else:
+                email.status = 'sent'
+                email.sent_at = now()
+                email.last_error = None
+                sent += 1
+            email.save(update_fields=['status', 'last_error', 'next_attempt_at', 'sent_at'])
+    finally:
+        connection.close()
+
+    return sent, failed
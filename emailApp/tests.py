@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+from django.utils.timezone import now
+
+from emailApp.models import QueuedEmail
+from emailApp.services import MAX_ATTEMPTS, queue_email, send_queued_emails
+
+
+class QueuedEmailTests(TestCase):
+
+    def test_queue_email_does_not_send(self):
+        queue_email("Subject", "Body", ['someone@gmail.com', None])
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.recipient_list, ['someone@gmail.com'])
+        self.assertEqual(email.status, 'pending')
+
+    def test_worker_sends_batch(self):
+        for i in range(3):
+            queue_email(f"Subject {i}", "Body", [f'user{i}@gmail.com'], html_message="<p>Body</p>")
+
+        self.assertEqual(send_queued_emails(batch_size=10), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(QueuedEmail.objects.filter(status='sent').count(), 3)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        email = queue_email("Subject", "Body", ['someone@gmail.com'])
+
+        with mock.patch('emailApp.services.EmailMultiAlternatives.send', side_effect=OSError("down")):
+            self.assertEqual(send_queued_emails(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'pending')
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, email.created_at)
+
+        # Not due yet, so the next run skips it
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+        QueuedEmail.objects.filter(pk=email.pk).update(attempts=MAX_ATTEMPTS - 1, next_attempt_at=email.created_at)
+        with mock.patch('emailApp.services.EmailMultiAlternatives.send', side_effect=OSError("down")):
+            send_queued_emails()
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'failed')
+
+    def test_worker_dying_mid_batch_does_not_resend(self):
+        from emailApp.services import EmailMultiAlternatives
+
+        for i in range(3):
+            queue_email(f"Subject {i}", "Body", [f'user{i}@gmail.com'])
+
+        send = EmailMultiAlternatives.send
+        calls = []
+
+        def send_then_die(message, *args, **kwargs):
+            calls.append(message.subject)
+            if len(calls) == 2:
+                raise SystemExit
+            return send(message, *args, **kwargs)
+
+        with mock.patch('emailApp.services.EmailMultiAlternatives.send', send_then_die):
+            with self.assertRaises(SystemExit):
+                send_queued_emails()
+        self.assertEqual(QueuedEmail.objects.filter(status='sent').count(), 1)
+
+        # The rest stay claimed until the claim times out, then go out once
+        self.assertEqual(send_queued_emails(), (0, 0))
+        QueuedEmail.objects.filter(status='pending').update(next_attempt_at=now())
+        self.assertEqual(send_queued_emails(), (2, 0))
+        self.assertEqual([message.subject for message in mail.outbox], ['Subject 0', 'Subject 1', 'Subject 2'])
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProfessionalappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'professionalApp'
+
+    def ready(self):
+        import professionalApp.signals
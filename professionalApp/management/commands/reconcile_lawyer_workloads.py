@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from professionalApp.services import reconcile_workloads
+
+
+class Command(BaseCommand):
+    help = "Recount lawyers' workload counters from their cases and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted counters')
+
+    def handle(self, *args, **options):
+        drifted = reconcile_workloads(dry_run=options['dry_run'])
+        for lawyer_id, (stored, actual) in drifted.items():
+            self.stdout.write(f"Lawyer {lawyer_id}: stored {stored or 'missing'}, actual {actual}")
+        action = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(f"{action} {len(drifted)} drifted workload(s)")
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.17 on 2026-10-17 02:57
+
+from django.db import migrations, models
+
+from userApp.locations import normalize_location
+
+
+LOCATION_CODE_FIELDS = [
+    ('residence_district', 'residence_district_code'),
+    ('residence_sector', 'residence_sector_code'),
+]
+
+
+def fill_location_codes(apps, schema_editor):
+    """Compute the location codes of existing rows"""
+    Lawyer = apps.get_model('professionalApp', 'Lawyer')
+
+    rows = list(Lawyer.objects.only('id', *(name_field for name_field, _ in LOCATION_CODE_FIELDS)))
+    for row in rows:
+        for name_field, code_field in LOCATION_CODE_FIELDS:
+            setattr(row, code_field, normalize_location(getattr(row, name_field)))
+    Lawyer.objects.bulk_update(rows, [code_field for _, code_field in LOCATION_CODE_FIELDS], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('professionalApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lawyer',
+            name='residence_district_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='lawyer',
+            name='residence_sector_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='lawyer',
+            index=models.Index(fields=['residence_district_code', 'residence_sector_code'], name='lawyer_residence_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lawyer',
+            index=models.Index(fields=['residence_sector_code'], name='lawyer_sector_idx'),
+        ),
+        migrations.RunPython(fill_location_codes, migrations.RunPython.noop),
+    ]
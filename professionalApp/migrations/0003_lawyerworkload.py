@@ -0,0 +1,47 @@
+# Generated by Django 4.2.17 on 2026-10-17 02:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+OPEN_STATUSES = ('pending', 'assigned', 'in_progress')
+
+
+def fill_workloads(apps, schema_editor):
+    """Count the open cases of every lawyer that has any"""
+    Case = apps.get_model('caseApp', 'Case')
+    LawyerWorkload = apps.get_model('professionalApp', 'LawyerWorkload')
+
+    counts = Case.objects.filter(
+        lawyer__isnull=False,
+        status__in=OPEN_STATUSES
+    ).values('lawyer').annotate(total=models.Count('id'))
+    LawyerWorkload.objects.bulk_create(
+        [LawyerWorkload(lawyer_id=row['lawyer'], open_cases=row['total']) for row in counts],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caseApp', '0001_initial'),
+        ('professionalApp', '0002_location_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LawyerWorkload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_cases', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lawyer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='workload', to='professionalApp.lawyer')),
+            ],
+            options={
+                'verbose_name': 'Lawyer Workload',
+                'verbose_name_plural': 'Lawyer Workloads',
+            },
+        ),
+        migrations.RunPython(fill_workloads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.17 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+STATUS_FIELDS = {
+    'pending': 'pending_cases',
+    'assigned': 'assigned_cases',
+    'in_progress': 'in_progress_cases',
+}
+
+
+def fill_status_counters(apps, schema_editor):
+    """Count every lawyer's open cases per status; give lawyers without any an empty row"""
+    Case = apps.get_model('caseApp', 'Case')
+    Lawyer = apps.get_model('professionalApp', 'Lawyer')
+    LawyerWorkload = apps.get_model('professionalApp', 'LawyerWorkload')
+
+    LawyerWorkload.objects.bulk_create(
+        [LawyerWorkload(lawyer_id=lawyer_id) for lawyer_id in
+         Lawyer.objects.filter(workload__isnull=True).values_list('id', flat=True)],
+        batch_size=500
+    )
+
+    counts = {}
+    rows = Case.objects.filter(
+        lawyer__isnull=False,
+        status__in=STATUS_FIELDS
+    ).order_by().values('lawyer', 'status').annotate(total=models.Count('id'))
+    for row in rows:
+        counters = counts.setdefault(row['lawyer'], {})
+        counters[STATUS_FIELDS[row['status']]] = row['total']
+
+    workloads = []
+    for workload in LawyerWorkload.objects.filter(lawyer_id__in=counts):
+        for field, total in counts[workload.lawyer_id].items():
+            setattr(workload, field, total)
+        workload.open_cases = sum(counts[workload.lawyer_id].values())
+        workloads.append(workload)
+    LawyerWorkload.objects.bulk_update(workloads, [*STATUS_FIELDS.values(), 'open_cases'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('professionalApp', '0003_lawyerworkload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lawyerworkload',
+            name='assigned_cases',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lawyerworkload',
+            name='in_progress_cases',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lawyerworkload',
+            name='pending_cases',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_status_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lawyerworkload',
+            index=models.Index(fields=['open_cases', 'lawyer'], name='workload_open_cases_idx'),
+        ),
+    ]
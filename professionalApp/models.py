@@ -6,9 +6,37 @@ from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.utils.crypto import get_random_string
 from userApp.models import CustomUser
+from userApp.locations import set_location_codes
 from speciliarizationApp.models import Specialization
 
 
+class LawyerQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for lawyers
+    """
+
+    def for_directory(self):
+        """
+        Only what LawyerDirectorySerializer reads: the user's phone number and
+        specialization names, in a fixed number of queries
+        """
+        return self.select_related('user').prefetch_related(
+            models.Prefetch(
+                'specializations',
+                queryset=Specialization.objects.only('id', 'name')
+            )
+        )
+
+    def for_profile(self):
+        """Join and prefetch every relation the full LawyerSerializer touches"""
+        return self.select_related('user', 'created_by').prefetch_related(
+            models.Prefetch(
+                'specializations',
+                queryset=Specialization.objects.select_related('created_by')
+            )
+        )
+
+
 class Lawyer(models.Model):
     """
     Extended profile for users with the 'lawyer' role
@@ -66,6 +94,15 @@ class Lawyer(models.Model):
     residence_district = models.CharField(max_length=100)
     residence_sector = models.CharField(max_length=100)
     
+    # Normalized, indexed forms of the location (see userApp.locations)
+    residence_district_code = models.CharField(max_length=100, blank=True, default='', editable=False)
+    residence_sector_code = models.CharField(max_length=100, blank=True, default='', editable=False)
+    
+    LOCATION_CODE_FIELDS = {
+        'residence_district': 'residence_district_code',
+        'residence_sector': 'residence_sector_code',
+    }
+    
     # Professional information
     education_level = models.CharField(max_length=20, choices=EDUCATION_LEVEL_CHOICES)
     diploma = models.FileField(upload_to='lawyer_diplomas/', blank=True, null=True)
@@ -93,6 +130,8 @@ class Lawyer(models.Model):
         Specialization,
         related_name='lawyer_specializations'
     )
+    
+    objects = LawyerQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.user.phone_number})"
@@ -101,13 +140,91 @@ class Lawyer(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Lawyer'
         verbose_name_plural = 'Lawyers'
+        indexes = [
+            models.Index(fields=['residence_district_code', 'residence_sector_code'], name='lawyer_residence_idx'),
+            models.Index(fields=['residence_sector_code'], name='lawyer_sector_idx'),
+        ]
         
     def save(self, *args, **kwargs):
         # Set the initial status to pending for new lawyers
         if not self.pk:
             self.status = 'pending'
+        kwargs['update_fields'] = set_location_codes(self, self.LOCATION_CODE_FIELDS, kwargs.get('update_fields'))
         super().save(*args, **kwargs)
-        
 
 
+class LawyerWorkload(models.Model):
+    """
+    Open cases per lawyer, per status and in total, kept up to date from Case
+    saves and deletes (see professionalApp.signals) so matching and load
+    balancing never have to count cases per lawyer. Every lawyer has a row.
+    Fix drift with `manage.py reconcile_lawyer_workloads`.
+    """
+    # Case status -> counter of the lawyer's cases in that status
+    STATUS_FIELDS = {
+        'pending': 'pending_cases',
+        'assigned': 'assigned_cases',
+        'in_progress': 'in_progress_cases',
+    }
+    COUNTER_FIELDS = ['pending_cases', 'assigned_cases', 'in_progress_cases', 'open_cases']
+
+    lawyer = models.OneToOneField(
+        Lawyer,
+        on_delete=models.CASCADE,
+        related_name='workload'
+    )
+    pending_cases = models.PositiveIntegerField(default=0)
+    assigned_cases = models.PositiveIntegerField(default=0)
+    in_progress_cases = models.PositiveIntegerField(default=0)
+    # Sum of the per-status counters
+    open_cases = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Lawyer Workload'
+        verbose_name_plural = 'Lawyer Workloads'
+        indexes = [
+            models.Index(fields=['open_cases', 'lawyer'], name='workload_open_cases_idx'),
+        ]
+
+    def __str__(self):
+        return f"Workload for lawyer {self.lawyer_id}: {self.open_cases} open"
+
+    @classmethod
+    def adjust(cls, lawyer_id, **deltas):
+        """Add the given deltas to the lawyer's counters in a single UPDATE"""
+        updates = {}
+        for field, delta in deltas.items():
+            if not delta:
+                continue
+            value = models.F(field) + delta
+            if delta < 0:
+                # Never below zero, even if the counter has drifted
+                value = models.Case(
+                    models.When(**{f'{field}__lt': -delta}, then=models.Value(0)),
+                    default=value
+                )
+            updates[field] = value
+        if not updates:
+            return
+        cls.objects.get_or_create(lawyer_id=lawyer_id)
+        cls.objects.filter(lawyer_id=lawyer_id).update(**updates, updated_at=now())
 
+    @classmethod
+    def move_case(cls, old, new):
+        """
+        Move one case from the (lawyer_id, status) pair old to new. Either may
+        be None, or have no lawyer or a closed status, for a case that does
+        not count on that side.
+        """
+        deltas = {}
+        for side, delta in ((old, -1), (new, 1)):
+            lawyer_id, case_status = side or (None, None)
+            field = cls.STATUS_FIELDS.get(case_status)
+            if lawyer_id is None or field is None:
+                continue
+            counters = deltas.setdefault(lawyer_id, {})
+            counters[field] = counters.get(field, 0) + delta
+            counters['open_cases'] = counters.get('open_cases', 0) + delta
+        for lawyer_id, counters in deltas.items():
+            cls.adjust(lawyer_id, **counters)
@@ -0,0 +1,5 @@
+from backend.pagination import NewestFirstCursorPagination
+
+
+class LawyerDirectoryPagination(NewestFirstCursorPagination):
+    """Keyset pagination for the lawyer directory, newest first"""
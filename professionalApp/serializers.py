@@ -43,4 +43,31 @@ class LawyerSerializer(serializers.ModelSerializer):
     
     def get_full_name(self, obj):
         middle = f" {obj.middle_name}" if obj.middle_name else ""
-        return f"{obj.first_name}{middle} {obj.last_name}"
\ No newline at end of file
+        return f"{obj.first_name}{middle} {obj.last_name}"
+
+class SpecializationSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Specialization
+        fields = ['id', 'name']
+
+
+class LawyerDirectorySerializer(serializers.ModelSerializer):
+    """
+    Slim projection for lawyer listings; the full profile comes from
+    LawyerSerializer on the detail endpoint
+    """
+    specializations = SpecializationSummarySerializer(many=True, read_only=True)
+    user_phone = serializers.CharField(source='user.phone_number', read_only=True)
+    full_name = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Lawyer
+        fields = [
+            'id', 'full_name', 'user_phone', 'gender', 'residence_district',
+            'residence_sector', 'years_of_experience', 'bio', 'status',
+            'availability_status', 'specializations'
+        ]
+
+    def get_full_name(self, obj):
+        middle = f" {obj.middle_name}" if obj.middle_name else ""
+        return f"{obj.first_name}{middle} {obj.last_name}"
@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils.timezone import now
+
+from caseApp.models import Case
+from .models import Lawyer, LawyerWorkload
+from .serializers import LawyerSerializer
+
+
+LAWYERS_BY_SPECIALIZATION_CACHE_PREFIX = 'professionalApp:lawyers_by_specialization'
+LAWYERS_BY_SPECIALIZATION_CACHE_TIMEOUT = 600  # seconds; bounds staleness across processes
+
+
+def cache_key(name):
+    return f"{LAWYERS_BY_SPECIALIZATION_CACHE_PREFIX}:{name}"
+
+
+def get_cache_generation():
+    """
+    Current generation of the lawyers-by-specialization cache. Entries are
+    keyed by it, so bumping it invalidates every specialization at once.
+    """
+    generation = cache.get(cache_key('generation'))
+    if generation is None:
+        generation = 1
+        cache.add(cache_key('generation'), generation, None)
+    return generation
+
+
+def invalidate_lawyers_by_specialization():
+    """
+    Drop every cached lawyers-by-specialization response. Each response
+    nests the lawyers' other specializations and users too, so any change
+    invalidates them all rather than only the specializations involved.
+    """
+    try:
+        cache.incr(cache_key('generation'))
+    except ValueError:
+        cache.set(cache_key('generation'), 2, None)
+
+
+def count_cache_event(event):
+    try:
+        cache.incr(cache_key(event))
+    except ValueError:
+        cache.add(cache_key(event), 1, None)
+
+
+def get_lawyers_by_specialization(specialization_id):
+    """
+    Serialized accepted, active lawyers with the specialization, served from
+    the cache until a lawyer, specialization or lawyer account changes
+    """
+    key = cache_key(f"{get_cache_generation()}:{specialization_id}")
+    data = cache.get(key)
+    if data is not None:
+        count_cache_event('hits')
+        return data
+
+    count_cache_event('misses')
+    lawyers = Lawyer.objects.for_profile().filter(
+        specializations=specialization_id,
+        status='accepted',  # Only return accepted lawyers
+        availability_status='active'  # Only return active lawyers
+    )
+    data = list(LawyerSerializer(lawyers, many=True).data)
+    cache.set(key, data, LAWYERS_BY_SPECIALIZATION_CACHE_TIMEOUT)
+    return data
+
+
+def get_cache_stats():
+    """Hit/miss counters of the lawyers-by-specialization cache"""
+    hits = cache.get(cache_key('hits'), 0)
+    misses = cache.get(cache_key('misses'), 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+        'generation': get_cache_generation()
+    }
+
+
+def count_workloads(lawyer_ids=None):
+    """
+    Workload counters computed from the Case table, {lawyer_id: {field: n}},
+    for the given lawyers (default: all lawyers with open cases)
+    """
+    cases = Case.objects.filter(lawyer__isnull=False, status__in=LawyerWorkload.STATUS_FIELDS)
+    if lawyer_ids is not None:
+        cases = cases.filter(lawyer__in=lawyer_ids)
+
+    workloads = {}
+    for row in cases.order_by().values('lawyer', 'status').annotate(total=Count('id')):
+        counters = workloads.setdefault(row['lawyer'], dict.fromkeys(LawyerWorkload.COUNTER_FIELDS, 0))
+        counters[LawyerWorkload.STATUS_FIELDS[row['status']]] = row['total']
+        counters['open_cases'] += row['total']
+    return workloads
+
+
+def reconcile_workloads(dry_run=False):
+    """
+    Compare every lawyer's workload counters with a fresh count of their cases
+    and, unless dry_run, correct the ones that drifted. Each correction
+    recounts under a lock on the lawyer's row, so concurrent case changes are
+    not lost. Returns {lawyer_id: (stored, actual)} for the drifted lawyers.
+    """
+    empty = dict.fromkeys(LawyerWorkload.COUNTER_FIELDS, 0)
+    actual = count_workloads()
+    stored = {
+        row.pop('lawyer_id'): row
+        for row in LawyerWorkload.objects.values('lawyer_id', *LawyerWorkload.COUNTER_FIELDS)
+    }
+    missing = Lawyer.objects.filter(workload__isnull=True).values_list('id', flat=True)
+
+    drifted = {}
+    for lawyer_id in sorted(set(actual) | set(stored) | set(missing)):
+        counters = stored.get(lawyer_id)
+        if counters != actual.get(lawyer_id, empty):
+            drifted[lawyer_id] = (counters, actual.get(lawyer_id, empty))
+    if dry_run:
+        return drifted
+
+    for lawyer_id in drifted:
+        with transaction.atomic():
+            workload, _ = LawyerWorkload.objects.select_for_update().get_or_create(lawyer_id=lawyer_id)
+            counters = count_workloads([lawyer_id]).get(lawyer_id, empty)
+            LawyerWorkload.objects.filter(pk=workload.pk).update(**counters, updated_at=now())
+    return drifted
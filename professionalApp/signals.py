@@ -0,0 +1,70 @@
+# professionalApp/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from caseApp.models import Case
+from speciliarizationApp.models import Specialization
+from userApp.models import CustomUser
+from .models import Lawyer, LawyerWorkload
+from .services import invalidate_lawyers_by_specialization
+
+
+@receiver(post_save, sender=Lawyer)
+@receiver(post_delete, sender=Lawyer)
+@receiver(post_save, sender=Specialization)
+@receiver(post_delete, sender=Specialization)
+def refresh_lawyers_by_specialization(sender, instance, **kwargs):
+    """
+    Invalidate the cached lawyer lists when a lawyer or specialization changes.
+    Invalidation waits for the commit; bumping the generation earlier would
+    let a concurrent miss cache the old rows under the new generation.
+    """
+    transaction.on_commit(invalidate_lawyers_by_specialization)
+
+
+@receiver(m2m_changed, sender=Lawyer.specializations.through)
+def refresh_on_specializations_changed(sender, instance, action, **kwargs):
+    """Invalidate the cached lawyer lists when a lawyer gains or loses specializations"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(invalidate_lawyers_by_specialization)
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_on_user_changed(sender, instance, update_fields=None, **kwargs):
+    """
+    The cached lists embed lawyers' accounts and their creators (admins);
+    login timestamp updates are ignored
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    if instance.role in ('lawyer', 'admin'):
+        transaction.on_commit(invalidate_lawyers_by_specialization)
+
+
+@receiver(post_save, sender=Lawyer)
+def create_workload_for_lawyer(sender, instance, created, **kwargs):
+    """Give every new lawyer an empty workload row, so load balancing lists them"""
+    if created:
+        LawyerWorkload.objects.get_or_create(lawyer=instance)
+
+
+@receiver(post_save, sender=Case)
+def update_workload_on_case_save(sender, instance, created, update_fields=None, **kwargs):
+    """Move the case between workload counters when its lawyer or status changes"""
+    if created:
+        LawyerWorkload.move_case(None, (instance.lawyer_id, instance.status))
+    elif instance.has_changed('status', 'lawyer', update_fields=update_fields):
+        LawyerWorkload.move_case(
+            (instance.get_original_value('lawyer'), instance.get_original_value('status')),
+            (
+                instance.get_saved_value('lawyer', update_fields),
+                instance.get_saved_value('status', update_fields)
+            )
+        )
+
+
+@receiver(post_delete, sender=Case)
+def update_workload_on_case_delete(sender, instance, **kwargs):
+    """Drop a deleted case from its lawyer's counters"""
+    LawyerWorkload.move_case((instance.lawyer_id, instance.status), None)
@@ -1,3 +1,164 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from professionalApp.models import Lawyer
+from professionalApp.services import get_cache_stats
+from speciliarizationApp.models import Specialization
+from userApp.models import CustomUser
+
+
+class LawyerTestCase(TestCase):
+    """
+    Base class with a helper creating lawyers with a shared specialization
+    """
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            phone_number='0780000000', role='admin', email='admin@gmail.com', password='Secret#123'
+        )
+        self.specialization = Specialization.objects.create(name='Family Law', created_by=self.admin)
+        self.counter = 0
+
+    def make_lawyer(self, **fields):
+        self.counter += 1
+        n = self.counter
+        user = CustomUser.objects.create_user(phone_number=f'0782{n:06d}', role='lawyer')
+        lawyer = Lawyer.objects.create(
+            user=user, first_name='Lawyer', last_name=str(n), gender='female',
+            marital_status='single', residence_district=fields.pop('residence_district', 'Gasabo'),
+            residence_sector='Remera', education_level='master',
+            national_id_number=f'L{n:015d}', created_by=self.admin
+        )
+        if fields:
+            Lawyer.objects.filter(pk=lawyer.pk).update(**fields)
+        lawyer.specializations.add(self.specialization)
+        return lawyer
+
+
+class LawyerDirectoryTests(LawyerTestCase):
+    """
+    The public directory is paginated, filterable and N+1-free
+    """
+
+    def get_directory(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = APIClient().get(reverse('lawyerApp:get_all_lawyers'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(context.captured_queries)
+
+    def test_query_count_is_constant(self):
+        self.make_lawyer()
+        _, single = self.get_directory()
+
+        for _ in range(5):
+            self.make_lawyer()
+        body, many = self.get_directory()
+
+        self.assertEqual(body['page_count'], 6)
+        self.assertEqual(single, many)
+
+    def test_filters(self):
+        accepted = self.make_lawyer(status='accepted', availability_status='active')
+        elsewhere = self.make_lawyer(residence_district='Nyarugenge')
+
+        body, _ = self.get_directory(status='accepted', availability='active')
+        self.assertEqual([lawyer['id'] for lawyer in body['data']], [accepted.id])
+
+        body, _ = self.get_directory(district='nyarugenge', specialization=self.specialization.id)
+        self.assertEqual([lawyer['id'] for lawyer in body['data']], [elsewhere.id])
+
+
+class LawyersBySpecializationCacheTests(LawyerTestCase):
+    """
+    Lawyers-by-specialization responses are cached until lawyers change
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def get_by_specialization(self):
+        response = APIClient().get(
+            reverse('lawyerApp:get_all_lawyers_by_specialization', args=[self.specialization.id])
+        )
+        return response.json()['data']
+
+    def test_cached_until_lawyer_changes(self):
+        lawyer = self.make_lawyer(status='accepted', availability_status='active')
+        self.assertEqual(len(self.get_by_specialization()), 1)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(len(self.get_by_specialization()), 1)
+        self.assertEqual(len(context.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lawyer.specializations.clear()
+            # Not invalidated before the change commits
+            self.assertEqual(len(self.get_by_specialization()), 1)
+        self.assertEqual(self.get_by_specialization(), [])
+
+        stats = get_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_cache_stats_for_admin_role_only(self):
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        self.assertEqual(api.get(reverse('lawyerApp:get_lawyer_cache_stats')).status_code, 200)
+
+        api.force_authenticate(self.make_lawyer().user)
+        self.assertEqual(api.get(reverse('lawyerApp:get_lawyer_cache_stats')).status_code, 403)
+
+
+class LawyersByResidenceTests(LawyerTestCase):
+    """
+    Residence lookups match on the normalized location codes
+    """
+
+    def get_by_residence(self, **params):
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        response = api.get(reverse('lawyerApp:get_lawyers_by_residence'), params)
+        return response.status_code, response.json()
+
+    def test_exact_and_prefix_lookups(self):
+        lawyer = self.make_lawyer(status='accepted', availability_status='active')
+        self.make_lawyer(status='accepted', availability_status='active', residence_district='Nyarugenge')
+        self.assertEqual(lawyer.residence_district_code, 'gasabo')
+
+        _, body = self.get_by_residence(district=' GASABO ')
+        self.assertEqual([row['id'] for row in body['data']], [lawyer.id])
+
+        _, body = self.get_by_residence(district='gas')
+        self.assertEqual(body['data'], [])
+
+        _, body = self.get_by_residence(district='gas', match='prefix')
+        self.assertEqual([row['id'] for row in body['data']], [lawyer.id])
+
+    def test_filter_required(self):
+        status_code, _ = self.get_by_residence()
+        self.assertEqual(status_code, 400)
+
+
+class LawyerWorkloadViewTests(LawyerTestCase):
+    """
+    The load-balancing view lists lawyers least loaded first, for admins only
+    """
+
+    def test_workloads_for_admin_role(self):
+        from professionalApp.models import LawyerWorkload
+
+        busy = self.make_lawyer()
+        idle = self.make_lawyer()
+        LawyerWorkload.objects.filter(lawyer=busy).update(assigned_cases=2, open_cases=2)
+
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        response = api.get(reverse('lawyerApp:get_lawyer_workloads'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['lawyer_id'] for row in response.json()['data']], [idle.id, busy.id])
+
+        api.force_authenticate(busy.user)
+        self.assertEqual(api.get(reverse('lawyerApp:get_lawyer_workloads')).status_code, 403)
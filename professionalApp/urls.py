@@ -22,6 +22,8 @@ urlpatterns = [
     # Get lawyer info for the logged-in user
     path('user/', views.get_logged_in_lawyer_info, name='get_logged_in_lawyer_info'),
     path('specialization/<int:id>/', views.get_all_lawyers_by_specialization, name='get_all_lawyers_by_specialization'),
+    path('specialization/cache-stats/', views.get_lawyer_cache_stats, name='get_lawyer_cache_stats'),
+    path('workloads/', views.get_lawyer_workloads, name='get_lawyer_workloads'),
     
     path('profile/', views.get_lawyer_profile, name='lawyer-profile'),
     path('profile/update/', views.update_lawyer_profile, name='update-lawyer-profile'),
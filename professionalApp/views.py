@@ -1,19 +1,21 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.db import IntegrityError, transaction
 from django.http import Http404
 
-from .models import Lawyer
-from .serializers import LawyerSerializer
+from .models import Lawyer, LawyerWorkload
+from .pagination import LawyerDirectoryPagination
+from .serializers import LawyerSerializer, LawyerDirectorySerializer
+from .services import get_lawyers_by_specialization, get_cache_stats
 from userApp.models import CustomUser
 import random
 import string
 import re
-from django.core.mail import send_mail
+from emailApp.services import queue_email
 from userApp.models import CustomUser
 from django.contrib.auth.hashers import make_password
 from django.core.validators import validate_email
@@ -21,6 +23,8 @@ from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.utils.timezone import now
 from speciliarizationApp.models import Specialization
+from clientApp.models import Client
+from userApp.locations import normalize_location
 
 def is_valid_password(password):
     """Validate password complexity."""
@@ -272,7 +276,7 @@ def create_lawyer(request):
                     "This is a system-generated password. Please change it after your first login."
                 )
                 
-                send_mail(
+                queue_email(
                     subject="Welcome to Bridge to Legal Help System",
                     message=message,
                     from_email="no-reply@blhs.com",
@@ -444,20 +448,40 @@ def update_lawyer(request, lawyer_id):
 @permission_classes([AllowAny])
 def get_all_lawyers(request):
     """
-    Get all lawyers using serializer for consistent data formatting
+    Public lawyer directory, one cursor page at a time.
+    Optional filters: status, availability, specialization (id), district.
     """
     try:
-        # Get all lawyers with their related data
-        lawyers = Lawyer.objects.all()
-
-        # Use the serializer to format the data
-        serializer = LawyerSerializer(lawyers, many=True)
+        lawyers = Lawyer.objects.for_directory()
+        
+        status_filter = request.query_params.get('status')
+        availability = request.query_params.get('availability')
+        specialization = request.query_params.get('specialization')
+        district = request.query_params.get('district')
         
-        print(f"Lawyers retrieved: {serializer.data}\n\n")
+        if status_filter:
+            lawyers = lawyers.filter(status=status_filter)
+        if availability:
+            lawyers = lawyers.filter(availability_status=availability)
+        if specialization:
+            if not specialization.isdigit():
+                return Response({
+                    'status': 'error',
+                    'message': 'specialization must be a specialization ID'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            lawyers = lawyers.filter(specializations=specialization)
+        if district:
+            lawyers = lawyers.filter(residence_district_code=normalize_location(district))
+        
+        paginator = LawyerDirectoryPagination()
+        page = paginator.paginate_queryset(lawyers, request)
+        serializer = LawyerDirectorySerializer(page, many=True)
 
         return Response({
             'status': 'success',
-            'count': len(serializer.data),
+            'page_count': len(serializer.data),
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
             'data': serializer.data
         }, status=status.HTTP_200_OK)
 
@@ -478,7 +502,7 @@ def get_lawyer_by_id(request, lawyer_id):
     Get lawyer details by ID
     """
     try:
-        lawyer = get_object_or_404(Lawyer, id=lawyer_id)
+        lawyer = get_object_or_404(Lawyer.objects.for_profile(), id=lawyer_id)
         serializer = LawyerSerializer(lawyer)
         
         return Response({
@@ -622,12 +646,25 @@ def get_logged_in_lawyer_info(request):
 @permission_classes([IsAuthenticated])
 def get_lawyers_by_residence(request):
     """
-    Get lawyers filtered by residence (district and/or sector)
+    Get lawyers filtered by residence (district and/or sector).
+    Names are matched on their normalized codes, exactly or, with
+    ?match=prefix, by prefix. Clients that give no filter get the lawyers
+    in their own district.
     """
     try:
-        # Get query parameters
-        district = request.data.get('district')
-        sector = request.data.get('sector')
+        # Get query parameters (request body still accepted for older clients)
+        district = request.query_params.get('district') or request.data.get('district')
+        sector = request.query_params.get('sector') or request.data.get('sector')
+        match = request.query_params.get('match', 'exact')
+        
+        if match not in ('exact', 'prefix'):
+            return Response({
+                'status': 'error',
+                'message': "match must be 'exact' or 'prefix'"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not district and not sector and request.user.role == 'customer':
+            district = Client.objects.filter(user=request.user).values_list('district', flat=True).first()
         
         # Validate at least one filter is provided - validation in view
         if not district and not sector:
@@ -636,16 +673,23 @@ def get_lawyers_by_residence(request):
                 'message': 'At least one filter (district or sector) must be provided'
             }, status=status.HTTP_400_BAD_REQUEST)
             
-        # Build the filter based on provided parameters
+        # Build the filter on the indexed location codes. Codes are already
+        # lower case; istartswith compiles to a plain LIKE 'x%' on MySQL,
+        # which can range-scan the index (startswith uses LIKE BINARY)
+        lookup = 'exact' if match == 'exact' else 'istartswith'
         filters = Q()
         
         if district:
-            filters &= Q(residence_district__icontains=district)
+            filters &= Q(**{f'residence_district_code__{lookup}': normalize_location(district)})
             
         if sector:
-            filters &= Q(residence_sector__icontains=sector)
+            filters &= Q(**{f'residence_sector_code__{lookup}': normalize_location(sector)})
             
-        lawyers = Lawyer.objects.filter(filters)
+        lawyers = Lawyer.objects.filter(filters).select_related('user').only(
+            'id', 'first_name', 'middle_name', 'last_name', 'residence_district',
+            'residence_sector', 'years_of_experience', 'status',
+            'availability_status', 'created_at', 'user', 'user__phone_number'
+        )
         
         # Only include accepted and active lawyers by default
         status_filter = request.query_params.get('status', 'accepted')
@@ -707,20 +751,13 @@ def get_all_lawyers_by_specialization(request, id):
         }, status=status.HTTP_400_BAD_REQUEST)
         
     try:
-        # Filter lawyers that have the specified specialization
-        lawyers = Lawyer.objects.filter(
-            specializations__id=id,
-            status='accepted',  # Only return accepted lawyers
-            availability_status='active'  # Only return active lawyers
-        ).distinct()
-        
-        # Use the serializer to format the data
-        serializer = LawyerSerializer(lawyers, many=True)
+        # Cached per specialization, see professionalApp.services
+        data = get_lawyers_by_specialization(id)
         
         return Response({
             'status': 'success',
-            'count': len(serializer.data),
-            'data': serializer.data
+            'count': len(data),
+            'data': data
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -742,6 +779,78 @@ def get_all_lawyers_by_specialization(request, id):
         
         
         
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_lawyer_cache_stats(request):
+    """
+    Hit/miss counters of the lawyers-by-specialization cache, for monitoring
+    (admin only)
+    """
+    if request.user.role != 'admin':
+        return Response({
+            'status': 'error',
+            'message': 'Only admins can view cache statistics'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    return Response({
+        'status': 'success',
+        'data': get_cache_stats()
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_lawyer_workloads(request):
+    """
+    Lawyers by open cases, least loaded first, with their per-status counts,
+    read from the maintained workload counters (admin only).
+    Optional filters: status, availability, limit (default 50, max 200).
+    """
+    if request.user.role != 'admin':
+        return Response({
+            'status': 'error',
+            'message': 'Only admins can view lawyer workloads'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        limit = min(int(request.query_params.get('limit', 50)), 200)
+    except ValueError:
+        return Response({
+            'status': 'error',
+            'message': 'limit must be a number'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    workloads = LawyerWorkload.objects.select_related('lawyer').only(
+        *LawyerWorkload.COUNTER_FIELDS,
+        'lawyer__first_name', 'lawyer__last_name',
+        'lawyer__status', 'lawyer__availability_status'
+    ).order_by('open_cases', 'lawyer_id')
+
+    status_filter = request.query_params.get('status')
+    availability = request.query_params.get('availability')
+    if status_filter:
+        workloads = workloads.filter(lawyer__status=status_filter)
+    if availability:
+        workloads = workloads.filter(lawyer__availability_status=availability)
+
+    data = [
+        {
+            'lawyer_id': workload.lawyer_id,
+            'full_name': f"{workload.lawyer.first_name} {workload.lawyer.last_name}",
+            'status': workload.lawyer.status,
+            'availability_status': workload.lawyer.availability_status,
+            **{field: getattr(workload, field) for field in LawyerWorkload.COUNTER_FIELDS}
+        }
+        for workload in workloads[:limit]
+    ]
+
+    return Response({
+        'status': 'success',
+        'count': len(data),
+        'data': data
+    }, status=status.HTTP_200_OK)
+
+
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
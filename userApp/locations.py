@@ -0,0 +1,33 @@
+# userApp/locations.py
+import unicodedata
+
+
+def normalize_location(value):
+    """
+    Code for an administrative area name (province, district, sector, cell):
+    lower case, accents dropped and hyphens and runs of whitespace collapsed
+    to one space, so 'Nyarugenge ', 'nyarugenge' and 'NYARUGENGE' match
+    """
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode()
+    return ' '.join(value.lower().replace('-', ' ').split())
+
+
+def set_location_codes(instance, code_fields, update_fields=None):
+    """
+    Fill the indexed code field of each {name field: code field} pair on a
+    model instance from its name. Returns update_fields with the code fields
+    of any updated names added, for use in save().
+    """
+    for name_field, code_field in code_fields.items():
+        setattr(instance, code_field, normalize_location(getattr(instance, name_field)))
+
+    if update_fields is None:
+        return None
+    update_fields = set(update_fields)
+    update_fields.update(
+        code_field for name_field, code_field in code_fields.items()
+        if name_field in update_fields
+    )
+    return update_fields
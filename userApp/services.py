@@ -0,0 +1,29 @@
+from django.core.cache import cache
+
+from .models import CustomUser
+
+
+ADMIN_EMAILS_CACHE_KEY = 'userApp:admin_emails'
+ADMIN_EMAILS_CACHE_TIMEOUT = 300  # seconds; bounds staleness across processes
+
+
+def get_admin_emails():
+    """
+    Email addresses of all active admins, cached until an admin account changes
+    """
+    emails = cache.get(ADMIN_EMAILS_CACHE_KEY)
+    if emails is None:
+        emails = list(
+            CustomUser.objects.filter(
+                role='admin',
+                is_active=True,
+                email__isnull=False
+            ).exclude(email='').order_by('id').values_list('email', flat=True)
+        )
+        cache.set(ADMIN_EMAILS_CACHE_KEY, emails, ADMIN_EMAILS_CACHE_TIMEOUT)
+    return list(emails)
+
+
+def invalidate_admin_emails():
+    """Drop the cached admin recipient list"""
+    cache.delete(ADMIN_EMAILS_CACHE_KEY)
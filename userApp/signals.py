@@ -0,0 +1,18 @@
+# userApp/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import CustomUser
+from .services import invalidate_admin_emails
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def refresh_admin_recipients(sender, instance, **kwargs):
+    """
+    Invalidate the cached admin recipient list when a user changes.
+    Any save can change role, email or is_active, so every save invalidates,
+    once the change commits so a concurrent miss cannot re-cache old rows.
+    """
+    transaction.on_commit(invalidate_admin_emails)
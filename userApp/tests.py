@@ -1,3 +1,42 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from userApp.models import CustomUser
+from userApp.services import get_admin_emails
+
+
+class AdminEmailCacheTests(TestCase):
+    """
+    The admin recipient list is cached until an account changes
+    """
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin = CustomUser.objects.create_user(
+                phone_number='0780000000', role='admin', email='admin@gmail.com', password='Secret#123'
+            )
+
+    def test_admin_emails_are_cached(self):
+        self.assertEqual(get_admin_emails(), ['admin@gmail.com'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_admin_emails(), ['admin@gmail.com'])
+
+    def test_saving_an_admin_invalidates(self):
+        get_admin_emails()
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.create_user(
+                phone_number='0780000001', role='admin', email='second@gmail.com', password='Secret#123'
+            )
+        self.assertEqual(get_admin_emails(), ['admin@gmail.com', 'second@gmail.com'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.is_active = False
+            self.admin.save()
+        self.assertEqual(get_admin_emails(), ['second@gmail.com'])
+
+    def test_deleting_an_admin_invalidates(self):
+        get_admin_emails()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.delete()
+        self.assertEqual(get_admin_emails(), [])
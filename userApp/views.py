@@ -1,7 +1,7 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.core.mail import send_mail
+from emailApp.services import queue_email
 from django.db.utils import IntegrityError
 from .models import CustomUser
 from django.contrib.auth.hashers import make_password
@@ -23,7 +23,6 @@ import string
 
 
 import re
-from django.core.mail import send_mail
 from django.contrib.auth.hashers import make_password
 from django.db import IntegrityError
 from rest_framework.decorators import api_view, permission_classes
@@ -163,7 +162,7 @@ def register_user(request):
             if is_admin_creating:
                 message += "This is a system-generated password. Please change it after your first login."
             
-            send_mail(
+            queue_email(
                 subject="Your Account Password",
                 message=message,
                 from_email="no-reply@gmail.com",
@@ -251,7 +250,6 @@ def login_user(request):
 import re
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.core.mail import send_mail
 from .models import CustomUser
 
 @api_view(['POST'])
@@ -294,7 +292,7 @@ def reset_password(request):
         user.save()
 
         # Send the new password to the user's email
-        send_mail(
+        queue_email(
             subject="Your New Password",
             message=f"Your password has been reset to The Bridge to Legal Help System (BLHS).\n Your new password is: {new_password}",
             from_email="no-reply@rops.com",
@@ -553,7 +551,6 @@ import logging
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from .serializers import ContactUsSerializer
-from django.core.mail import send_mail
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from rest_framework import status
@@ -592,16 +589,15 @@ def contact_us(request):
             logger.error("Invalid email format: %s", email)
             return Response({"error": "Invalid email format."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Sending email
+        # Queue email for background delivery
         try:
-            send_mail(
+            queue_email(
                 subject=f"Contact Us: {subject}",
                 message=f"Name: {names}\nEmail: {email}\n\nDescription:\n{description}",
                 from_email=email,
                 recipient_list=['princemugabe568@gmail.com'],
-                fail_silently=False,
             )
-            logger.info("Email sent successfully to %s", email)
+            logger.info("Email queued successfully from %s", email)
             return Response({"message": "Email sent successfully."}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.exception("An error occurred while sending email: %s", e)